@@ -118,7 +118,7 @@ class ProfileView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.get_object()
-        articles = Article.objects.filter(
+        articles = Article.objects.for_list().filter(
             author=user,
             status='published'
         ).select_related('category').prefetch_related('tags')
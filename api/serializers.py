@@ -1,9 +1,8 @@
 # api/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from blog.models import Article, Category
+from blog.models import Article, Category, CustomTag, ARTICLE_LIST_DEFERRED_FIELDS
 from comments.models import Comment
-from taggit.models import Tag
 
 User = get_user_model()
 
@@ -27,28 +26,22 @@ class UserSerializer(serializers.ModelSerializer):
 
 class CategorySerializer(serializers.ModelSerializer):
     """分类序列化器"""
-    articles_count = serializers.SerializerMethodField()
+    articles_count = serializers.IntegerField(source='published_article_count', read_only=True)
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description',
                   'articles_count', 'created_at']
 
-    def get_articles_count(self, obj):
-        return obj.articles.filter(status='published').count()
-
 
 class TagSerializer(serializers.ModelSerializer):
     """标签序列化器"""
-    articles_count = serializers.SerializerMethodField()
+    articles_count = serializers.IntegerField(source='published_article_count', read_only=True)
 
     class Meta:
-        model = Tag
+        model = CustomTag
         fields = ['id', 'name', 'slug', 'articles_count']
 
-    def get_articles_count(self, obj):
-        return obj.taggit_taggeditem_items.count()
-
 
 class ArticleSerializer(serializers.ModelSerializer):
     """文章序列化器"""
@@ -72,6 +65,16 @@ class ArticleSerializer(serializers.ModelSerializer):
         ]
 
 
+class ArticleListSerializer(ArticleSerializer):
+    """文章列表序列化器（不含正文等大字段）"""
+
+    class Meta(ArticleSerializer.Meta):
+        fields = [
+            field for field in ArticleSerializer.Meta.fields
+            if field not in ARTICLE_LIST_DEFERRED_FIELDS
+        ]
+
+
 class ArticleCreateSerializer(serializers.ModelSerializer):
     """文章创建序列化器"""
     tags = serializers.ListField(
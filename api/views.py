@@ -6,11 +6,12 @@ from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from blog.models import Article, Category, ArticleLike, ArticleBookmark
+from blog.models import Article, Category
+from blog.reactions import get_reaction_store
 from comments.models import Comment, CommentLike
 from .serializers import (
-    UserSerializer, ArticleSerializer, ArticleCreateSerializer,
-    CategorySerializer, CommentSerializer
+    UserSerializer, ArticleSerializer, ArticleListSerializer,
+    ArticleCreateSerializer, CategorySerializer, CommentSerializer
 )
 
 User = get_user_model()
@@ -37,13 +38,13 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     def articles(self, request, pk=None):
         """获取用户的文章"""
         user = self.get_object()
-        articles = Article.objects.filter(
+        articles = Article.objects.for_list().filter(
             author=user,
             status='published'
         ).select_related('category').prefetch_related('tags')
 
         page = self.paginate_queryset(articles)
-        serializer = ArticleSerializer(page, many=True)
+        serializer = ArticleListSerializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
 
@@ -66,6 +67,8 @@ class ArticleViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return ArticleCreateSerializer
+        if self.action == 'list':
+            return ArticleListSerializer
         return ArticleSerializer
 
     def get_permissions(self):
@@ -81,6 +84,10 @@ class ArticleViewSet(viewsets.ModelViewSet):
         if tag:
             queryset = queryset.filter(tags__name=tag)
 
+        # 列表不读取正文
+        if self.action == 'list':
+            queryset = queryset.for_list()
+
         return queryset.select_related('author', 'category').prefetch_related('tags')
 
     @action(detail=True, methods=['post'])
@@ -95,24 +102,11 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        like, created = ArticleLike.objects.get_or_create(
-            article=article,
-            user=user
-        )
-
-        if not created:
-            like.delete()
-            liked = False
-        else:
-            article.like_count += 1
-            article.save(update_fields=['like_count'])
-            liked = True
-
-        article.refresh_from_db()
+        liked, likes_count = get_reaction_store().toggle('likes', article.pk, user.pk)
 
         return Response({
             'liked': liked,
-            'likes_count': article.like_count
+            'likes_count': likes_count
         })
 
     @action(detail=True, methods=['post'])
@@ -127,16 +121,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        bookmark, created = ArticleBookmark.objects.get_or_create(
-            article=article,
-            user=user
-        )
-
-        if not created:
-            bookmark.delete()
-            bookmarked = False
-        else:
-            bookmarked = True
+        bookmarked, _ = get_reaction_store().toggle('bookmarks', article.pk, user.pk)
 
         return Response({'bookmarked': bookmarked})
 
@@ -173,13 +158,13 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     def articles(self, request, pk=None):
         """获取分类下的文章"""
         category = self.get_object()
-        articles = Article.objects.filter(
+        articles = Article.objects.for_list().filter(
             category=category,
             status='published'
         ).select_related('author').prefetch_related('tags')
 
         page = self.paginate_queryset(articles)
-        serializer = ArticleSerializer(page, many=True)
+        serializer = ArticleListSerializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
 
@@ -0,0 +1,74 @@
+# blog/archive.py
+"""
+归档日历
+
+ArchiveMonth 按 (年, 月) 记录已发布文章数，归档页和筛选表单直接读取这张小表；
+按年月筛选文章时使用 created_at 的区间条件，可以走索引。
+"""
+from datetime import datetime
+
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+
+def archive_range(year, month=None):
+    """返回 [开始, 结束) 的时间区间（当前时区）"""
+    if month:
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+    else:
+        start = datetime(year, 1, 1)
+        end = datetime(year + 1, 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def filter_archive(queryset, year=None, month=None, field='created_at'):
+    """按年月筛选，有年份时用区间条件代替 __year / __month"""
+    if year not in (None, ''):
+        start, end = archive_range(int(year), int(month) if month else None)
+        return queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
+    if month:
+        return queryset.filter(**{f'{field}__month': month})
+    return queryset
+
+
+def adjust_archive_month(moment, delta):
+    """在所属月份上原子地增减文章数"""
+    from .models import ArchiveMonth
+
+    if not moment or not delta:
+        return
+    local = timezone.localtime(moment)
+    updated = ArchiveMonth.objects.filter(
+        year=local.year,
+        month=local.month
+    ).update(count=F('count') + delta)
+    if not updated:
+        archive, created = ArchiveMonth.objects.get_or_create(
+            year=local.year,
+            month=local.month,
+            defaults={'count': max(delta, 0)}
+        )
+        if not created:
+            # 并发创建时对方已经插入了这一行
+            ArchiveMonth.objects.filter(pk=archive.pk).update(count=F('count') + delta)
+
+
+def rebuild_archive_calendar():
+    """全表统计后重建归档日历，返回月份数"""
+    from .models import Article, ArchiveMonth
+
+    rows = list(Article.objects.filter(
+        status='published'
+    ).annotate(
+        year=ExtractYear('created_at'),
+        month=ExtractMonth('created_at')
+    ).values('year', 'month').annotate(count=Count('id')).order_by())
+
+    ArchiveMonth.objects.all().delete()
+    ArchiveMonth.objects.bulk_create([
+        ArchiveMonth(year=row['year'], month=row['month'], count=row['count'])
+        for row in rows
+    ])
+    return len(rows)
@@ -0,0 +1,44 @@
+# blog/article_cache.py
+"""
+文章详情页正文的共享缓存
+
+正文片段与访问者无关，按文章版本号缓存，所有用户共用同一份；
+点赞、收藏、作者按钮和实时计数由前端请求 ArticleViewerStateView 后填充。
+文章、标签或评论变化时只需把版本号加一，旧缓存自然失效。
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+ARTICLE_VERSION_KEY = 'blog:article:%s:version'
+ARTICLE_BODY_KEY = 'blog:article:%s:body:%s'
+
+
+def get_article_version(article_id):
+    """读取文章版本号，不存在时用当前时间初始化，保证不会与被淘汰的旧版本重复"""
+    key = ARTICLE_VERSION_KEY % article_id
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_article_version(article_id):
+    """使文章正文缓存失效"""
+    key = ARTICLE_VERSION_KEY % article_id
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_article_body(article, render):
+    """取缓存的正文片段，未命中时调用 render() 生成并写入缓存"""
+    key = ARTICLE_BODY_KEY % (article.pk, get_article_version(article.pk))
+    body = cache.get(key)
+    if body is None:
+        body = render()
+        cache.set(key, body, getattr(settings, 'BLOG_ARTICLE_BODY_CACHE_TIMEOUT', 60 * 60))
+    return body
@@ -0,0 +1,164 @@
+# blog/bulk.py
+"""
+草稿和收藏的批量操作
+
+一次查询校验归属，一条 UPDATE / DELETE 完成修改（字数和阅读时长在保存草稿时已算好），草稿数、归档日历、分类 / 标签计数等
+派生数据按批次维护；逐条的模型信号（含 Haystack 实时索引）在批量操作期间跳过，
+结束后发送一次 articles_changed，由搜索索引和缓存失效统一处理。
+"""
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .archive import adjust_archive_month
+from .counters import adjust_article_counts
+from .navigation import bump_adjacent_to
+from .user_stats import adjust_user_stat
+
+# 批量变化事件：sender=Article，article_ids=文章ID列表，action='published' / 'deleted'
+articles_changed = Signal()
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_operation():
+    """批量操作期间跳过逐条的信号处理"""
+    depth = getattr(_state, 'depth', 0)
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+
+
+def in_bulk_operation():
+    return getattr(_state, 'depth', 0) > 0
+
+
+def skip_in_bulk(receiver_func):
+    """信号处理函数装饰器：批量操作期间不执行，由 articles_changed 统一处理"""
+    @wraps(receiver_func)
+    def wrapper(*args, **kwargs):
+        if in_bulk_operation():
+            return None
+        return receiver_func(*args, **kwargs)
+    return wrapper
+
+
+def parse_ids(values):
+    """把提交的ID列表转成整数，忽略无效值"""
+    ids = set()
+    for value in values or []:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _adjust_archive(created_ats, sign):
+    """按月份合并后更新归档日历，每个月份一次 UPDATE"""
+    months = {}
+    for created_at in created_ats:
+        local = timezone.localtime(created_at)
+        moment, n = months.get((local.year, local.month), (created_at, 0))
+        months[(local.year, local.month)] = (moment, n + 1)
+    for moment, n in months.values():
+        adjust_archive_month(moment, sign * n)
+
+
+def publish_drafts(user, draft_ids):
+    """发布用户自己的草稿，返回发布的篇数"""
+    from .models import Article
+
+    draft_ids = parse_ids(draft_ids)
+    if not draft_ids:
+        return 0
+
+    with transaction.atomic(), bulk_operation():
+        rows = list(Article.objects.select_for_update().filter(
+            pk__in=draft_ids,
+            author=user,
+            status='draft'
+        ).values_list('pk', 'created_at'))
+        if not rows:
+            return 0
+
+        ids = [pk for pk, _ in rows]
+        now = timezone.now()
+        Article.objects.filter(pk__in=ids).update(
+            status='published',
+            published_at=Coalesce('published_at', Value(now)),
+            updated_at=now,
+        )
+
+        adjust_user_stat(user.pk, 'draft_count', -len(ids))
+        _adjust_archive([created_at for _, created_at in rows], 1)
+        adjust_article_counts(ids, 1)
+        bump_adjacent_to(Article.objects.filter(pk__in=ids).values_list('pk', 'published_at'))
+
+        transaction.on_commit(lambda: articles_changed.send(
+            sender=Article, article_ids=ids, action='published'
+        ))
+    return len(ids)
+
+
+def delete_articles(user, article_ids):
+    """删除用户自己的文章（草稿列表中的批量删除），返回删除的篇数"""
+    from .models import Article, ArticleBookmark
+
+    article_ids = parse_ids(article_ids)
+    if not article_ids:
+        return 0
+
+    with transaction.atomic(), bulk_operation():
+        rows = list(Article.objects.select_for_update().filter(
+            pk__in=article_ids,
+            author=user
+        ).values_list('pk', 'status', 'created_at', 'published_at'))
+        if not rows:
+            return 0
+
+        ids = [pk for pk, _, _, _ in rows]
+        # 被删除文章的收藏会级联删除，先统计各用户的收藏数变化
+        bookmark_counts = list(ArticleBookmark.objects.filter(
+            article_id__in=ids
+        ).values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+        # 分类和标签计数同样要在级联删除前统计
+        adjust_article_counts([row[0] for row in rows if row[1] == 'published'], -1)
+
+        Article.objects.filter(pk__in=ids).delete()
+
+        adjust_user_stat(user.pk, 'draft_count', -sum(1 for row in rows if row[1] == 'draft'))
+        for user_id, n in bookmark_counts:
+            adjust_user_stat(user_id, 'bookmark_count', -n)
+        _adjust_archive([row[2] for row in rows if row[1] == 'published'], -1)
+        bump_adjacent_to([(row[0], row[3]) for row in rows if row[1] == 'published'])
+
+        transaction.on_commit(lambda: articles_changed.send(
+            sender=Article, article_ids=ids, action='deleted'
+        ))
+    return len(ids)
+
+
+def remove_bookmarks(user, bookmark_ids):
+    """取消用户自己的收藏，返回取消的个数"""
+    from .models import ArticleBookmark
+    from .reactions import get_reaction_store
+
+    bookmark_ids = parse_ids(bookmark_ids)
+    if not bookmark_ids:
+        return 0
+
+    article_ids = list(ArticleBookmark.objects.filter(
+        pk__in=bookmark_ids,
+        user=user
+    ).values_list('article_id', flat=True))
+    return get_reaction_store().remove_many('bookmarks', user.pk, article_ids)
@@ -0,0 +1,92 @@
+# blog/categories.py
+"""
+分类树
+
+Category.path 保存从根到自身的主键路径（如 "3/12/40/"），depth 为层级（根为 0），
+保存和移动分类时维护。某个分类及其全部子孙分类下的文章是一次 path 前缀查询；
+整棵树从一次查询构建，连同面包屑放在 site_context_cache 中，分类变化时随之失效。
+"""
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+
+from .local_cache import site_context_cache
+
+
+def build_path(parent_path, pk):
+    return f'{parent_path}{pk}/'
+
+
+def path_ids(path):
+    """路径上的分类ID，从根到自身"""
+    return [int(pk) for pk in path.split('/') if pk]
+
+
+def path_depth(path):
+    return max(path.count('/') - 1, 0)
+
+
+def move_subtree(old_path, new_path):
+    """把 old_path 下的整棵子树（含自身）改到 new_path 下，一条 UPDATE"""
+    from .models import Category
+
+    return Category.objects.filter(path__startswith=old_path).update(
+        path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+        depth=F('depth') + (path_depth(new_path) - path_depth(old_path)),
+    )
+
+
+def subtree_filter(category, field='category'):
+    """文章等模型上“属于该分类或其子孙分类”的条件"""
+    return Q(**{f'{field}__path__startswith': category.path})
+
+
+def load_category_tree():
+    """
+    一次查询构建启用分类的树
+
+    返回 {'roots': 根分类, 'by_id': {ID: 分类}, 'menu': 先序遍历的分类列表}，
+    每个分类带 tree_children（子分类）和 subtree_article_count（含子孙分类的已发布文章数）。
+    上级分类停用时整棵子树都不显示。
+    """
+    from .models import Category
+
+    categories = list(Category.objects.filter(is_active=True).order_by('depth', 'order', 'name'))
+    by_id = {category.pk: category for category in categories}
+    roots = []
+    for category in categories:
+        category.tree_children = []
+    for category in categories:
+        if category.parent_id is None:
+            roots.append(category)
+        elif category.parent_id in by_id:
+            by_id[category.parent_id].tree_children.append(category)
+
+    # 按层级从深到浅累加子树的文章数
+    for category in reversed(categories):
+        category.subtree_article_count = category.published_article_count + sum(
+            child.subtree_article_count for child in category.tree_children
+        )
+
+    menu = []
+    stack = list(reversed(roots))
+    while stack:
+        category = stack.pop()
+        menu.append(category)
+        stack.extend(reversed(category.tree_children))
+
+    return {'roots': roots, 'by_id': by_id, 'menu': menu}
+
+
+def get_category_tree():
+    return site_context_cache.get_or_set('category_tree', load_category_tree)
+
+
+def get_breadcrumbs(category):
+    """从根到该分类的分类列表，不访问数据库"""
+    by_id = get_category_tree()['by_id']
+    return [by_id[pk] for pk in path_ids(category.path) if pk in by_id]
+
+
+def get_subcategories(category):
+    node = get_category_tree()['by_id'].get(category.pk)
+    return node.tree_children if node else []
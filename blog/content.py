@@ -0,0 +1,88 @@
+# blog/content.py
+"""
+文章内容分析
+
+保存时运行一次：去掉 HTML 后统计字数（中日韩字符按字计、拉丁文字按词计），
+估算阅读时长，摘要为空时生成摘要，并提取 h2~h4 标题作为目录，
+结果写入 Article 的 word_count / reading_time / summary / toc 字段，列表页和详情页直接读取。
+正文本身不修改，标题的 id 在渲染时补上（见 blog/rendering.py），与这里的目录使用同一套规则。
+"""
+import html
+import math
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# 每分钟阅读量
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+SUMMARY_LENGTH = 200
+
+# 平假名、片假名、CJK 统一表意文字（含扩展 A）、兼容表意文字、谚文
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+CJK_RE = re.compile(f'[{CJK_CHARS}]')
+WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’\-.][A-Za-z0-9]+)*")
+HEADING_RE = re.compile(r'<h([2-4])(\s[^>]*)?>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+ID_RE = re.compile(r'''\sid\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+BLOCK_END_RE = re.compile(r'</(p|div|h[1-6]|li|blockquote|pre|tr)\s*>|<br\s*/?>', re.IGNORECASE)
+
+
+def html_to_text(value):
+    """去掉标签并合并空白，块级元素之间保留一个空格"""
+    value = BLOCK_END_RE.sub(' ', value or '')
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(value))).strip()
+
+
+def count_words(text):
+    """返回 (中日韩字符数, 拉丁词数)"""
+    cjk = len(CJK_RE.findall(text))
+    words = len(WORD_RE.findall(CJK_RE.sub(' ', text)))
+    return cjk, words
+
+
+def reading_minutes(cjk, words):
+    return max(1, math.ceil(cjk / CJK_CHARS_PER_MINUTE + words / WORDS_PER_MINUTE))
+
+
+def make_summary(excerpt, text):
+    """有手写摘要时用摘要，否则截取正文开头"""
+    source = html_to_text(excerpt) or text
+    return Truncator(source).chars(SUMMARY_LENGTH)
+
+
+def add_heading_anchors(content):
+    """
+    给 h2~h4 标题补上 id 并返回 (新内容, 目录)
+
+    目录为 [{'level': 2, 'title': '...', 'anchor': 'toc-1'}, ...]，已有 id 的标题沿用原 id。
+    """
+    toc = []
+
+    def replace(match):
+        level, attrs, inner = match.group(1), match.group(2) or '', match.group(3)
+        title = html_to_text(inner)
+        if not title:
+            return match.group(0)
+        existing = ID_RE.search(attrs)
+        if existing:
+            anchor = existing.group(1)
+        else:
+            anchor = f'toc-{len(toc) + 1}'
+            attrs = f' id="{anchor}"{attrs}'
+        toc.append({'level': int(level), 'title': title, 'anchor': anchor})
+        return f'<h{level}{attrs}>{inner}</h{level}>'
+
+    return HEADING_RE.sub(replace, content or ''), toc
+
+
+def analyze_content(article):
+    """分析正文并把结果写回文章对象（不保存，也不修改 content）"""
+    _, article.toc = add_heading_anchors(article.content)
+    text = html_to_text(article.content)
+    cjk, words = count_words(text)
+    article.word_count = cjk + words
+    article.reading_time = reading_minutes(cjk, words)
+    article.summary = make_summary(article.excerpt, text)
+    return article
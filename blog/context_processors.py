@@ -1,49 +1,61 @@
 # blog/context_processors.py
 from django.conf import settings
-from django.db.models import Count
+from django.db import DatabaseError
 from .models import Category, Article, Tag, SiteSettings
+from .categories import get_category_tree
+from .local_cache import site_context_cache
+from .user_stats import get_user_stats
 from comments.models import Comment
 from datetime import datetime
 
 
-def site_settings(request):
-    """站点设置"""
+def load_site_settings():
+    """从数据库读取站点设置，没有记录时使用 settings 中的默认值"""
     try:
         site_settings_obj = SiteSettings.objects.first()
-    except:
-        site_settings_obj = {
-            'site_name': getattr(settings, 'SITE_NAME', '我的博客'),
-            'site_description': getattr(settings, 'SITE_DESCRIPTION', '欢迎访问我的博客'),
-            'site_keywords': getattr(settings, 'SITE_KEYWORDS', '博客,写作,分享'),
-            'contact_email': getattr(settings, 'CONTACT_EMAIL', ''),
-            'contact_phone': getattr(settings, 'CONTACT_PHONE', ''),
-            'contact_address': getattr(settings, 'CONTACT_ADDRESS', ''),
-            'facebook_url': getattr(settings, 'FACEBOOK_URL', ''),
-            'twitter_url': getattr(settings, 'TWITTER_URL', ''),
-            'github_url': getattr(settings, 'GITHUB_URL', ''),
-            'weibo_url': getattr(settings, 'WEIBO_URL', ''),
-            'google_analytics_id': getattr(settings, 'GOOGLE_ANALYTICS_ID', ''),
-        }
+    except DatabaseError:
+        site_settings_obj = None
+
+    return site_settings_obj or {
+        'site_name': getattr(settings, 'SITE_NAME', '我的博客'),
+        'site_description': getattr(settings, 'SITE_DESCRIPTION', '欢迎访问我的博客'),
+        'site_keywords': getattr(settings, 'SITE_KEYWORDS', '博客,写作,分享'),
+        'contact_email': getattr(settings, 'CONTACT_EMAIL', ''),
+        'contact_phone': getattr(settings, 'CONTACT_PHONE', ''),
+        'contact_address': getattr(settings, 'CONTACT_ADDRESS', ''),
+        'facebook_url': getattr(settings, 'FACEBOOK_URL', ''),
+        'twitter_url': getattr(settings, 'TWITTER_URL', ''),
+        'github_url': getattr(settings, 'GITHUB_URL', ''),
+        'weibo_url': getattr(settings, 'WEIBO_URL', ''),
+        'google_analytics_id': getattr(settings, 'GOOGLE_ANALYTICS_ID', ''),
+    }
+
+
+def load_navigation_categories():
+    """导航栏显示有文章的启用分类"""
+    return list(Category.objects.filter(
+        is_active=True,
+        published_article_count__gt=0
+    )[:10])
+
 
+def site_settings(request):
+    """站点设置"""
     return {
-        'site_settings': site_settings_obj,
+        'site_settings': site_context_cache.get_or_set('site_settings', load_site_settings),
         'current_year': datetime.now().year,
     }
 
 
 def navigation_categories(request):
-    """导航栏分类"""
-    try:
-        categories = Category.objects.filter(
-            is_active=True,
-            show_in_nav=True
-        ).annotate(
-            article_count=Count('articles')
-        ).filter(article_count__gt=0)[:10]
-    except:
-        categories = []
-
-    return {'categories': categories}
+    """导航栏分类和分类树菜单"""
+    return {
+        'categories': site_context_cache.get_or_set('navigation_categories', load_navigation_categories),
+        'category_menu': [
+            category for category in get_category_tree()['menu']
+            if category.subtree_article_count
+        ],
+    }
 
 
 def common_context(request):
@@ -56,14 +68,7 @@ def common_context(request):
 
     # 添加用户相关信息
     if request.user.is_authenticated:
-        from .models import Article, ArticleBookmark
-        context['draft_count'] = Article.objects.filter(
-            author=request.user,
-            status='draft'
-        ).count()
-
-        context['bookmark_count'] = ArticleBookmark.objects.filter(
-            user=request.user
-        ).count()
+        # draft_count、bookmark_count 由信号维护在缓存中
+        context.update(get_user_stats(request.user.pk))
 
     return context
\ No newline at end of file
@@ -0,0 +1,105 @@
+# blog/counters.py
+"""
+分类和标签的已发布文章数
+
+Category.published_article_count 和 CustomTag.published_article_count 由信号和批量操作
+随文章发布、取消发布、删除、改分类和增删标签增量维护，侧边栏、导航和 API 直接读取；
+计数漂移可用 ``python manage.py reconcile_article_counts`` 修复。
+
+计数列只由 UPDATE ... F() 修改：已有分类 / 标签的整行保存（如后台编辑）不写这一列，
+否则会把读出时的旧值写回，覆盖这期间信号做的增量。
+"""
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+
+COUNT_FIELD = 'published_article_count'
+
+
+def exclude_count_field(instance, kwargs):
+    """已有行的整行保存改为只更新计数列以外的字段；调用方在 update_fields 中指定计数列时照常写入"""
+    if kwargs.get('update_fields') is None and not instance._state.adding:
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name != COUNT_FIELD
+        ]
+    return kwargs
+
+
+def _apply(model, deltas):
+    """把 {主键: 增量} 用一条 UPDATE ... CASE 语句写入计数列"""
+    deltas = {pk: delta for pk, delta in deltas.items() if pk and delta}
+    if not deltas:
+        return 0
+    whens = [
+        When(pk=pk, then=F('published_article_count') + delta)
+        for pk, delta in deltas.items()
+    ]
+    return model.objects.filter(pk__in=deltas.keys()).update(
+        published_article_count=Greatest(
+            Case(*whens, default=F('published_article_count'), output_field=IntegerField()),
+            0
+        )
+    )
+
+
+def adjust_category_counts(deltas):
+    from .models import Category
+    return _apply(Category, deltas)
+
+
+def adjust_tag_counts(deltas):
+    from .models import CustomTag
+    return _apply(CustomTag, deltas)
+
+
+def article_tag_ids(article_ids):
+    """返回这些文章的全部标签ID（同一标签出现多次）"""
+    from .models import TaggedArticle
+    return list(TaggedArticle.objects.filter(
+        object_id__in=article_ids,
+        content_type__app_label='blog',
+        content_type__model='article',
+    ).values_list('tag_id', flat=True))
+
+
+def adjust_article_counts(article_ids, sign):
+    """一批文章同时发布（sign=1）或取消发布 / 删除（sign=-1）时更新分类和标签计数"""
+    from .models import Article
+
+    if not article_ids:
+        return
+    categories = Counter(Article.objects.filter(
+        pk__in=article_ids
+    ).values_list('category_id', flat=True))
+    tags = Counter(article_tag_ids(article_ids))
+    adjust_category_counts({pk: sign * n for pk, n in categories.items()})
+    adjust_tag_counts({pk: sign * n for pk, n in tags.items()})
+
+
+def reconcile_article_counts():
+    """按数据库重新统计全部计数，返回修正的 (分类数, 标签数)"""
+    from .models import Article, Category, CustomTag, TaggedArticle
+
+    category_counts = Article.objects.filter(
+        category=OuterRef('pk'),
+        status='published'
+    ).order_by().values('category').annotate(n=Count('id')).values('n')
+    published_ids = Article.objects.filter(status='published').values('pk')
+    tag_counts = TaggedArticle.objects.filter(
+        tag=OuterRef('pk'),
+        content_type__app_label='blog',
+        content_type__model='article',
+        object_id__in=published_ids,
+    ).order_by().values('tag').annotate(n=Count('id')).values('n')
+
+    fixed = []
+    for model, counts in ((Category, category_counts), (CustomTag, tag_counts)):
+        expected = Coalesce(Subquery(counts), Value(0))
+        fixed.append(model.objects.annotate(
+            expected=expected
+        ).exclude(published_article_count=F('expected')).count())
+        model.objects.update(published_article_count=expected)
+    return tuple(fixed)
@@ -1,7 +1,7 @@
 # blog/forms.py
 from django import forms
 from django.utils.text import slugify
-from .models import Article, Category
+from .models import Article, ArchiveMonth, Category
 from ckeditor.widgets import CKEditorWidget
 
 
@@ -88,12 +88,9 @@ class ArticleFilterForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # 动态生成年份和月份选项
-        from django.db.models.functions import ExtractYear, ExtractMonth
-        from django.db.models import Count
-
-        years = Article.objects.annotate(
-            year=ExtractYear('created_at')
+        # 动态生成年份和月份选项（年份来自归档日历，不扫描文章表）
+        years = ArchiveMonth.objects.filter(
+            count__gt=0
         ).values_list('year', flat=True).distinct().order_by('-year')
 
         months = [
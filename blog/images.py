@@ -0,0 +1,181 @@
+# blog/images.py
+"""
+响应式图片
+
+上传的特色图片和头像在请求之外用 Pillow 生成多种宽度的 WebP / JPEG 缩略图，
+记录在 ImageVariant 表中，模板用 {% responsive_image %} 输出 srcset / sizes。
+有 Redis 时新图片放入待处理集合，由 ``python manage.py build_image_variants --loop`` 生成；
+没有 Redis 的开发环境在进程内的后台线程里生成。已有图片用 ``build_image_variants --all`` 补齐。
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+# (格式, 扩展名, Pillow 编码参数)
+VARIANT_FORMATS = (
+    ('webp', 'webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+VARIANT_DIR = 'variants'
+
+PENDING_KEY = 'blog:images:pending'
+VARIANTS_CACHE_KEY = 'blog:images:%s'
+VARIANTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def variant_name(source, width, extension):
+    """article_images/2025/01/a.png -> variants/article_images/2025/01/a-640w.webp"""
+    stem = os.path.splitext(source)[0]
+    return f'{VARIANT_DIR}/{stem}-{width}w.{extension}'
+
+
+def _target_widths(width):
+    """不放大图片；原图比最小宽度还窄时只按原宽度生成一份"""
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    if width <= VARIANT_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def _encode(image, fmt, options):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # JPEG 不支持透明通道，铺白底
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """
+    生成并保存 source 的全部缩略图，返回 [(宽, 高, 格式, 文件名), ...]
+
+    只读写存储、不访问数据库，可以放在子进程中执行。
+    """
+    with default_storage.open(source, 'rb') as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    results = []
+    for width in _target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, extension, options in VARIANT_FORMATS:
+            name = variant_name(source, width, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(_encode(resized, fmt, options)))
+            results.append((width, height, fmt, name))
+    return results
+
+
+def record_variants(source, results):
+    """用新结果替换 source 的缩略图记录"""
+    from .models import ImageVariant
+
+    with transaction.atomic():
+        ImageVariant.objects.filter(source=source).delete()
+        ImageVariant.objects.bulk_create([
+            ImageVariant(source=source, width=width, height=height, format=fmt, name=name)
+            for width, height, fmt, name in results
+        ])
+    cache.delete(_cache_key(source))
+
+
+def generate_variants(source):
+    """生成缩略图并写入数据库；原图不存在或无法识别时返回 0"""
+    try:
+        results = render_variants(source)
+    except (OSError, ValueError):
+        return 0
+    record_variants(source, results)
+    return len(results)
+
+
+def _cache_key(source):
+    return VARIANTS_CACHE_KEY % hashlib.md5(source.encode('utf-8')).hexdigest()
+
+
+def get_variants(source):
+    """返回 {格式: [(宽, URL), ...]}，按宽度升序；还没有缩略图时为空字典"""
+    from .models import ImageVariant
+
+    key = _cache_key(source)
+    variants = cache.get(key)
+    if variants is None:
+        variants = {}
+        rows = ImageVariant.objects.filter(source=source).order_by('width')
+        for width, fmt, name in rows.values_list('width', 'format', 'name'):
+            variants.setdefault(fmt, []).append((width, default_storage.url(name)))
+        cache.set(key, variants, VARIANTS_CACHE_TIMEOUT)
+    return variants
+
+
+def needs_variants(source):
+    from .models import ImageVariant
+
+    return bool(source) and not ImageVariant.objects.filter(source=source).exists()
+
+
+def _use_redis():
+    backend = getattr(settings, 'BLOG_IMAGE_VARIANT_BACKEND', None)
+    if backend is None:
+        cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        backend = 'redis' if 'django_redis' in cache_backend else 'thread'
+    return backend == 'redis'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+_executor = None
+
+
+def _submit(source):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    _executor.submit(generate_variants, source)
+
+
+def schedule_variants(source):
+    """事务提交后安排生成缩略图，不占用当前请求"""
+    def enqueue():
+        if _use_redis():
+            _redis().sadd(PENDING_KEY, source)
+        else:
+            _submit(source)
+
+    transaction.on_commit(enqueue)
+
+
+def process_pending(batch_size=50):
+    """处理 Redis 中待生成的图片，返回处理的图片数"""
+    if not _use_redis():
+        return 0
+    client = _redis()
+    processed = 0
+    while True:
+        sources = client.spop(PENDING_KEY, batch_size)
+        if not sources:
+            return processed
+        for source in sources:
+            generate_variants(source.decode())
+            processed += 1
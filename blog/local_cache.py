@@ -0,0 +1,76 @@
+# blog/local_cache.py
+"""
+进程内缓存
+
+数据保存在每个 worker 自己的内存里，稳定状态下读取不访问数据库，也不访问 Redis；
+失效时把共享缓存中的版本号加一，各 worker 最多每隔 check_interval 秒检查一次版本号，
+发现变化就丢弃本地数据。
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedLocalCache:
+    """以共享版本号跨进程失效的本地缓存"""
+
+    def __init__(self, version_key, check_interval=None):
+        self.version_key = version_key
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._values = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def _get_check_interval(self):
+        if self.check_interval is not None:
+            return self.check_interval
+        return getattr(settings, 'BLOG_LOCAL_CACHE_CHECK_INTERVAL', 1.0)
+
+    def _sync_version(self):
+        """必要时读取共享版本号，版本变化则清空本地数据（调用方需持有锁）"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self._get_check_interval():
+            return self._version
+
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+
+        self._checked_at = now
+        if version != self._version:
+            self._values = {}
+            self._version = version
+        return version
+
+    def get_or_set(self, name, loader):
+        """取本地缓存的值，不存在时调用 loader() 加载"""
+        with self._lock:
+            version = self._sync_version()
+            if name in self._values:
+                return self._values[name]
+
+        value = loader()
+
+        with self._lock:
+            # 加载期间版本发生变化则不写入，下次重新加载
+            if self._version == version:
+                self._values[name] = value
+        return value
+
+    def invalidate(self):
+        """使所有 worker 的本地缓存失效"""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), None)
+        with self._lock:
+            self._values = {}
+            self._version = None
+
+
+# 站点设置和导航分类
+site_context_cache = VersionedLocalCache('blog:site_context:version')
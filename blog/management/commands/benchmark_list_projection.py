@@ -0,0 +1,61 @@
+# blog/management/commands/benchmark_list_projection.py
+import pickle
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Article
+
+
+def payload_bytes(articles):
+    """已加载字段的数据量（近似数据库传输的字节数）"""
+    total = 0
+    for article in articles:
+        loaded = article.get_deferred_fields()
+        for field in article._meta.concrete_fields:
+            if field.attname in loaded:
+                continue
+            value = getattr(article, field.attname)
+            if value is not None:
+                total += len(str(value).encode('utf-8'))
+    return total
+
+
+class Command(BaseCommand):
+    help = '比较列表页读取完整文章行与列表投影的耗时和数据量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=10, help='每页文章数，默认 10')
+        parser.add_argument('--repeat', type=int, default=20, help='重复次数，默认 20')
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        base = Article.objects.filter(
+            status='published'
+        ).select_related('author', 'category').order_by('-created_at')
+
+        results = {}
+        for name, queryset in (('完整行', base), ('列表投影', base.for_list())):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                articles = list(queryset[:per_page])
+                timings.append(time.perf_counter() - start)
+            results[name] = (
+                statistics.median(timings) * 1000,
+                payload_bytes(articles),
+                len(pickle.dumps(articles)),
+            )
+
+        self.stdout.write(f'每页 {per_page} 篇，重复 {options["repeat"]} 次取中位数')
+        for name, (ms, payload, pickled) in results.items():
+            self.stdout.write(
+                f'{name}: {ms:.2f} ms, 字段数据 {payload} 字节, 序列化缓存 {pickled} 字节'
+            )
+
+        full, projected = results['完整行'], results['列表投影']
+        self.stdout.write(self.style.SUCCESS(
+            f'每页节省 {full[0] - projected[0]:.2f} ms, '
+            f'{full[1] - projected[1]} 字段字节, {full[2] - projected[2]} 缓存字节'
+        ))
@@ -0,0 +1,26 @@
+# blog/management/commands/benchmark_related_articles.py
+from django.core.management.base import BaseCommand
+
+from blog.related import benchmark
+
+
+class Command(BaseCommand):
+    help = '用随机生成的文档测试相关文章计算的耗时（不访问数据库）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000, help='文章数，默认 100000')
+        parser.add_argument('--terms', type=int, default=200, help='每篇文章的词数，默认 200')
+        parser.add_argument('--top-k', type=int, default=6, help='每篇文章的相关文章数，默认 6')
+
+    def handle(self, *args, **options):
+        timings = benchmark(
+            options['articles'],
+            n_terms=options['terms'],
+            top_k=options['top_k'],
+        )
+        self.stdout.write(f'{options["articles"]} 篇文章，每篇 {options["terms"]} 个词')
+        self.stdout.write(f'生成文档: {timings["generate"]:.2f} 秒')
+        self.stdout.write(f'TF-IDF 向量化: {timings["vectorize"]:.2f} 秒（非零元素 {timings["nnz"]}）')
+        self.stdout.write(self.style.SUCCESS(
+            f'相似度与前 {options["top_k"]} 名: {timings["top_k"]:.2f} 秒'
+        ))
@@ -0,0 +1,43 @@
+# blog/management/commands/benchmark_search_analyzer.py
+from django.core.management.base import BaseCommand
+
+from blog.search_analysis import benchmark
+
+LABELS = {
+    'like': 'LIKE 子串匹配',
+    'stemming': 'Whoosh 默认分词',
+    'bigram': 'CJK 二元分词',
+    'jieba': 'jieba 词典分词',
+}
+
+
+class Command(BaseCommand):
+    help = '用随机生成的中文语料比较 LIKE 查询与各分词方式的召回率和查询耗时（不访问数据库）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=3000, help='文章数，默认 3000')
+        parser.add_argument('--words', type=int, default=120, help='每篇文章的词数，默认 120')
+        parser.add_argument('--queries', type=int, default=200, help='查询次数，默认 200')
+        parser.add_argument(
+            '--analyzers',
+            nargs='+',
+            default=['stemming', 'bigram'],
+            help='参与比较的分词方式，默认 stemming bigram',
+        )
+
+    def handle(self, *args, **options):
+        report = benchmark(
+            options['articles'],
+            n_words=options['words'],
+            n_queries=options['queries'],
+            analyzers=options['analyzers'],
+        )
+        self.stdout.write(f'{options["articles"]} 篇文章，每篇 {options["words"]} 个词，{options["queries"]} 次查询')
+        for name, result in report.items():
+            line = (
+                f'{LABELS.get(name, name)}: 召回率 {result["recall"]:.1%}，准确率 {result["precision"]:.1%}，'
+                f'查询中位数 {result["median_ms"]:.2f} ms，p95 {result["p95_ms"]:.2f} ms'
+            )
+            if 'build_s' in result:
+                line += f'，建索引 {result["build_s"]:.2f} 秒'
+            self.stdout.write(line)
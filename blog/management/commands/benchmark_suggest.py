@@ -0,0 +1,29 @@
+# blog/management/commands/benchmark_suggest.py
+from django.core.management.base import BaseCommand
+
+from blog.suggest import benchmark
+
+
+class Command(BaseCommand):
+    help = '用随机生成的标题比较内存前缀查询与 LIKE 前缀查询的耗时（不访问数据库）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100000, help='标题数，默认 100000')
+        parser.add_argument('--queries', type=int, default=2000, help='查询次数，默认 2000')
+        parser.add_argument('--limit', type=int, default=8, help='每次返回的提示数，默认 8')
+
+    def handle(self, *args, **options):
+        report = benchmark(options['entries'], n_queries=options['queries'], limit=options['limit'])
+        self.stdout.write(f'{options["entries"]} 个标题，{options["queries"]} 次前缀查询')
+        self.stdout.write(f'构建有序数组: {report["build_s"]:.2f} 秒')
+        for title, like, memory in (
+            ('随机前缀', 'like', 'memory'),
+            ('单字前缀（每次查询前修改一项）', 'like_broad', 'memory_broad'),
+        ):
+            self.stdout.write(title)
+            self.stdout.write(
+                f'  LIKE 前缀查询: p50 {report[like]["p50_ms"]:.3f} ms，p99 {report[like]["p99_ms"]:.3f} ms'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'  内存前缀查询: p50 {report[memory]["p50_ms"]:.3f} ms，p99 {report[memory]["p99_ms"]:.3f} ms'
+            ))
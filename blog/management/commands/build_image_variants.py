@@ -0,0 +1,111 @@
+# blog/management/commands/build_image_variants.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.images import VARIANT_DIR, process_pending, record_variants, render_variants
+from blog.models import ImageVariant
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
+
+
+def render_source(source):
+    """在子进程中生成一张图片的缩略图；无法识别的文件返回 None"""
+    try:
+        return source, render_variants(source)
+    except (OSError, ValueError):
+        return source, None
+
+
+def find_images(directories):
+    """列出 MEDIA_ROOT 下这些目录中的图片，返回相对路径"""
+    root = str(settings.MEDIA_ROOT)
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                    path = os.path.relpath(os.path.join(dirpath, filename), root)
+                    yield path.replace(os.sep, '/')
+
+
+class Command(BaseCommand):
+    help = '生成图片缩略图：默认处理新上传的图片，--all 用多进程补齐已有图片'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='扫描媒体目录，为还没有缩略图的已有图片生成缩略图',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='与 --all 一起使用，重新生成已有的缩略图',
+        )
+        parser.add_argument(
+            '--dirs',
+            nargs='+',
+            default=['article_images', 'profile_pics'],
+            help='--all 时扫描的 MEDIA_ROOT 子目录，默认 article_images profile_pics',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='--all 时的并行进程数，默认等于 CPU 核数',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='作为常驻进程循环处理新上传的图片',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='循环模式下两次处理之间的间隔（秒），默认 5',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            self.backfill(options)
+            return
+
+        while True:
+            processed = process_pending()
+            if processed or not options['loop']:
+                self.stdout.write(f'已处理 {processed} 张新图片')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def backfill(self, options):
+        sources = [
+            source for source in find_images(options['dirs'])
+            if not source.startswith(f'{VARIANT_DIR}/')
+        ]
+        if not options['force']:
+            done = set(ImageVariant.objects.values_list('source', flat=True).distinct())
+            sources = [source for source in sources if source not in done]
+
+        start = time.perf_counter()
+        # 子进程只读写文件，fork 前关闭数据库连接以免共享
+        connections.close_all()
+        processed = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            for source, results in pool.map(render_source, sources, chunksize=8):
+                if results is None:
+                    failed += 1
+                    self.stderr.write(f'无法处理 {source}')
+                    continue
+                record_variants(source, results)
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已为 {processed} 张图片生成缩略图（失败 {failed} 张），'
+            f'耗时 {time.perf_counter() - start:.2f} 秒'
+        ))
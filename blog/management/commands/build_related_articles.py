@@ -0,0 +1,39 @@
+# blog/management/commands/build_related_articles.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.related import compute_related_articles
+
+
+class Command(BaseCommand):
+    help = '按内容相似度计算相关文章，默认只重算上次计算后变化的文章'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='重新计算全部文章',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            help='每篇文章保存的相关文章数，默认取 BLOG_RELATED_ARTICLES_TOP_K',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=512,
+            help='每批计算相似度的文章数，默认 512',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = compute_related_articles(
+            full=options['full'],
+            top_k=options['top_k'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'已更新 {updated} 篇文章的相关文章，耗时 {time.perf_counter() - start:.2f} 秒'
+        ))
@@ -0,0 +1,26 @@
+# blog/management/commands/build_suggest_snapshot.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.suggest import write_snapshot
+
+
+class Command(BaseCommand):
+    help = '把文章标题、标签名和分类名写入搜索提示的快照文件，供 worker 启动时载入（定期运行以刷新浏览量等排序权重）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='快照文件路径，默认取 BLOG_SUGGEST_SNAPSHOT',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.BLOG_SUGGEST_SNAPSHOT
+        start = time.perf_counter()
+        count = write_snapshot(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'已写入 {count} 条搜索提示到 {path}，耗时 {time.perf_counter() - start:.2f} 秒'
+        ))
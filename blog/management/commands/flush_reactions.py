@@ -0,0 +1,34 @@
+# blog/management/commands/flush_reactions.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.reactions import get_reaction_store
+
+
+class Command(BaseCommand):
+    help = '把 Redis 中的点赞和收藏变化批量写回数据库，并重算点赞数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='作为常驻进程循环写回',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='循环模式下两次写回之间的间隔（秒），默认 10',
+        )
+
+    def handle(self, *args, **options):
+        store = get_reaction_store()
+
+        while True:
+            flushed = store.flush()
+            if flushed or not options['loop']:
+                self.stdout.write(f'已写回 {flushed} 篇文章的点赞和收藏')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+# blog/management/commands/flush_view_counts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.sidebar import rebuild_sidebar
+from blog.view_counter import get_view_counter
+
+
+class Command(BaseCommand):
+    help = '把缓冲中的文章浏览量增量批量写回数据库'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='作为常驻进程循环写回',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='循环模式下两次写回之间的间隔（秒），默认 30',
+        )
+
+    def handle(self, *args, **options):
+        counter = get_view_counter()
+
+        while True:
+            flushed = counter.flush()
+            if flushed:
+                # 浏览量变化后刷新侧边栏的热门文章
+                rebuild_sidebar(['popular_articles'])
+            if flushed or not options['loop']:
+                self.stdout.write(f'已写回 {flushed} 篇文章的浏览量')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,72 @@
+# blog/management/commands/process_search_outbox.py
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from haystack import connections
+from whoosh.index import LockError
+
+from blog.search_signals import process_search_outbox
+
+logger = logging.getLogger(__name__)
+
+
+def optimize_indexes():
+    for using in connections.connections_info:
+        connections[using].get_backend().optimize()
+
+
+class Command(BaseCommand):
+    help = '合并处理待更新的搜索索引（配合 QueuedSignalProcessor 使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='作为常驻进程循环处理',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='循环模式下队列为空时的等待间隔（秒），默认 5',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='每批读取的待更新记录数，默认 500',
+        )
+        parser.add_argument(
+            '--optimize-interval',
+            type=int,
+            default=getattr(settings, 'BLOG_SEARCH_OPTIMIZE_INTERVAL', 0),
+            help='循环模式下定时合并索引段的间隔（秒），0 为不定时合并，默认取 BLOG_SEARCH_OPTIMIZE_INTERVAL',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        optimize_interval = options['optimize_interval']
+        last_optimized = time.monotonic()
+        while True:
+            try:
+                updated = process_search_outbox(options['batch_size'])
+            except LockError:
+                if not options['loop']:
+                    raise
+                # 其他进程（如 update_index）正在写索引，待更新记录保留到下一轮
+                logger.warning('搜索索引写锁被占用，稍后重试')
+                updated = 0
+            total += updated
+            if updated:
+                # 队列里还有积压时不等待，直接处理下一批
+                continue
+            if not options['loop']:
+                break
+            if optimize_interval and time.monotonic() - last_optimized >= optimize_interval:
+                optimize_indexes()
+                last_optimized = time.monotonic()
+            time.sleep(options['interval'])
+
+        self.stdout.write(f'已更新 {total} 个对象的搜索索引')
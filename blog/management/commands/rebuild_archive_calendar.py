@@ -0,0 +1,15 @@
+# blog/management/commands/rebuild_archive_calendar.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.archive import rebuild_archive_calendar
+
+
+class Command(BaseCommand):
+    help = '按已发布文章重新统计归档日历，修复计数漂移'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            months = rebuild_archive_calendar()
+
+        self.stdout.write(self.style.SUCCESS(f'归档日历已重建，共 {months} 个月份'))
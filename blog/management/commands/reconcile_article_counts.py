@@ -0,0 +1,20 @@
+# blog/management/commands/reconcile_article_counts.py
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_article_counts
+from blog.local_cache import site_context_cache
+from blog.sidebar import rebuild_sidebar
+
+
+class Command(BaseCommand):
+    help = '按数据库重新统计分类和标签的已发布文章数，修复计数漂移'
+
+    def handle(self, *args, **options):
+        categories, tags = reconcile_article_counts()
+        if categories or tags:
+            rebuild_sidebar(['categories', 'tags'])
+            site_context_cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已修正 {categories} 个分类和 {tags} 个标签的计数'
+        ))
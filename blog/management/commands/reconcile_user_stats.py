@@ -0,0 +1,39 @@
+# blog/management/commands/reconcile_user_stats.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from blog.user_stats import reconcile_user_stats
+
+
+class Command(BaseCommand):
+    help = '按数据库重新统计用户的草稿数和收藏数，修复缓存中的计数漂移'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='user_ids',
+            help='只修复指定ID的用户',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每批处理的用户数，默认 1000',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if not user_ids:
+            user_ids = get_user_model().objects.values_list('pk', flat=True).order_by('pk')
+            user_ids = list(user_ids)
+
+        batch_size = options['batch_size']
+        fixed = 0
+        for start in range(0, len(user_ids), batch_size):
+            fixed += reconcile_user_stats(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已检查 {len(user_ids)} 个用户，修正 {fixed} 个计数'
+        ))
@@ -0,0 +1,97 @@
+# blog/management/commands/render_articles.py
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.article_cache import bump_article_version
+from blog.models import Article
+from blog.rendering import RENDER_VERSION, pygments_css, render_content
+
+CSS_HEADER = '/* static/css/pygments.css — 由 python manage.py render_articles --write-css 生成，代码块的服务端高亮样式 */\n'
+
+
+def render_batch(rows):
+    """在子进程中渲染一批 (id, content)，不访问数据库"""
+    return [(pk, render_content(content)) for pk, content in rows]
+
+
+class Command(BaseCommand):
+    help = '重新渲染文章正文（默认只处理渲染版本过期的文章），可多进程并行'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='重新渲染全部文章',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='并行渲染的进程数，默认等于 CPU 核数',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='每个任务渲染的文章数，默认 200',
+        )
+        parser.add_argument(
+            '--write-css',
+            action='store_true',
+            help='同时重新生成 static/css/pygments.css',
+        )
+
+    def handle(self, *args, **options):
+        if options['write_css']:
+            path = os.path.join(settings.BASE_DIR, 'static', 'css', 'pygments.css')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(CSS_HEADER + pygments_css() + '\n')
+            self.stdout.write(f'已生成 {path}')
+
+        queryset = Article.objects.all()
+        if not options['all']:
+            queryset = queryset.exclude(render_version=RENDER_VERSION)
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+        batch_size = options['batch_size']
+        batches = [ids[start:start + batch_size] for start in range(0, len(ids), batch_size)]
+
+        start = time.perf_counter()
+        # 子进程不访问数据库，fork 前关闭连接以免共享
+        connections.close_all()
+        rendered = 0
+        workers = max(1, options['workers'])
+
+        def save(results):
+            Article.objects.bulk_update(
+                [
+                    Article(pk=pk, rendered_content=html, render_version=RENDER_VERSION)
+                    for pk, html in results
+                ],
+                ['rendered_content', 'render_version'],
+            )
+            for pk, _ in results:
+                bump_article_version(pk)
+            return len(results)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 同时最多提交 2 * workers 批，正文按需读取，内存占用与文章总数无关
+            pending = set()
+            for batch in batches:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rendered += save(future.result())
+                rows = list(Article.objects.filter(pk__in=batch).values_list('pk', 'content'))
+                pending.add(pool.submit(render_batch, rows))
+            for future in pending:
+                rendered += save(future.result())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已渲染 {rendered} 篇文章，耗时 {time.perf_counter() - start:.2f} 秒'
+        ))
@@ -0,0 +1,53 @@
+# blog/management/commands/search_index_health.py
+import time
+
+from django.core.management.base import BaseCommand
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from blog.models import SearchIndexOutbox
+
+
+class Command(BaseCommand):
+    help = '查看搜索索引的段数、文档数和大小，可选合并索引段'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='把所有段合并为一个，并清除已删除的文档',
+        )
+        parser.add_argument(
+            '--probe',
+            default='',
+            help='用这个关键词执行一次搜索并报告耗时',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'待更新记录: {SearchIndexOutbox.objects.count()}')
+
+        for using in connections.connections_info:
+            backend = connections[using].get_backend()
+            if not hasattr(backend, 'health'):
+                self.stdout.write(f'[{using}] 后端不支持健康检查')
+                continue
+
+            if options['optimize']:
+                started = time.perf_counter()
+                backend.optimize()
+                self.stdout.write(f'[{using}] 已合并索引段，用时 {time.perf_counter() - started:.2f} 秒')
+
+            health = backend.health()
+            self.stdout.write(
+                f"[{using}] 段数 {health['segments']}，文档 {health['documents']}，"
+                f"已删除未合并 {health['deleted']}，大小 {health['size'] / 1024 / 1024:.2f} MB，"
+                f"代数 {health['generation']}，写锁{'被占用' if health['locked'] else '空闲'}"
+            )
+
+            if options['probe']:
+                started = time.perf_counter()
+                hits = SearchQuerySet(using=using).auto_query(options['probe']).count()
+                self.stdout.write(
+                    f"[{using}] 搜索“{options['probe']}”命中 {hits} 条，"
+                    f'用时 {(time.perf_counter() - started) * 1000:.1f} ms'
+                )
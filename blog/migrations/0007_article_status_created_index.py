@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 15:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_alter_article_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['status', '-created_at'], name='blog_article_status_created'),
+        ),
+    ]
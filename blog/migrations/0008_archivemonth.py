@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-17 07:24
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_archive_months(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    ArchiveMonth = apps.get_model('blog', 'ArchiveMonth')
+
+    rows = Article.objects.filter(
+        status='published'
+    ).annotate(
+        year=ExtractYear('created_at'),
+        month=ExtractMonth('created_at')
+    ).values('year', 'month').annotate(count=Count('id')).order_by()
+
+    ArchiveMonth.objects.bulk_create([
+        ArchiveMonth(year=row['year'], month=row['month'], count=row['count'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_article_status_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='年')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='月')),
+                ('count', models.IntegerField(default=0, verbose_name='文章数')),
+            ],
+            options={
+                'verbose_name': '归档月份',
+                'verbose_name_plural': '归档月份',
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_archive_month'),
+        ),
+        migrations.RunPython(populate_archive_months, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 07:26
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_published_at(apps, schema_editor):
+    # 上一篇 / 下一篇按 published_at 查找，早期没有写入发布时间的已发布文章以创建时间补齐
+    Article = apps.get_model('blog', 'Article')
+    Article.objects.filter(status='published', published_at__isnull=True).update(
+        published_at=F('created_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_archivemonth'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['status', 'published_at', 'id'], name='blog_article_status_pub'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 07:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_article_status_published_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('score', models.FloatField(verbose_name='相似度')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.article', verbose_name='文章')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_backlinks', to='blog.article', verbose_name='相关文章')),
+            ],
+            options={
+                'verbose_name': '相关文章',
+                'verbose_name_plural': '相关文章',
+                'ordering': ['article', 'rank'],
+                'indexes': [models.Index(fields=['article', 'rank'], name='blog_related_article_rank')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedarticle',
+            constraint=models.UniqueConstraint(fields=('article', 'related'), name='unique_related_article'),
+        ),
+    ]
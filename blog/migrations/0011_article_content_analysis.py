@@ -0,0 +1,85 @@
+# Generated by Django 6.0 on 2026-10-17 07:40
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# 以下是迁移编写时 blog/content.py 中分析逻辑的副本，之后修改 blog/content.py 不影响这里
+
+CJK_RE = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]')
+WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’\-.][A-Za-z0-9]+)*")
+HEADING_RE = re.compile(r'<h([2-4])(\s[^>]*)?>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+ID_RE = re.compile(r'''\sid\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+BLOCK_END_RE = re.compile(r'</(p|div|h[1-6]|li|blockquote|pre|tr)\s*>|<br\s*/?>', re.IGNORECASE)
+
+
+def html_to_text(value):
+    value = BLOCK_END_RE.sub(' ', value or '')
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(value))).strip()
+
+
+def extract_toc(content):
+    toc = []
+    for level, attrs, inner in HEADING_RE.findall(content or ''):
+        title = html_to_text(inner)
+        if not title:
+            continue
+        existing = ID_RE.search(attrs)
+        anchor = existing.group(1) if existing else f'toc-{len(toc) + 1}'
+        toc.append({'level': int(level), 'title': title, 'anchor': anchor})
+    return toc
+
+
+def analyze(article):
+    text = html_to_text(article.content)
+    cjk = len(CJK_RE.findall(text))
+    words = len(WORD_RE.findall(CJK_RE.sub(' ', text)))
+    article.toc = extract_toc(article.content)
+    article.word_count = cjk + words
+    article.reading_time = max(1, math.ceil(cjk / 400 + words / 200))
+    article.summary = Truncator(html_to_text(article.excerpt) or text).chars(200)
+    return article
+
+
+def analyze_existing_articles(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    fields = ['word_count', 'reading_time', 'summary', 'toc']
+
+    batch = []
+    for article in Article.objects.only('pk', 'content', 'excerpt').iterator(chunk_size=500):
+        batch.append(analyze(article))
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Article.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=250, verbose_name='列表摘要'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='目录'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='字数'),
+        ),
+        migrations.RunPython(analyze_existing_articles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_article_content_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='渲染版本'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rendered_content',
+            field=models.TextField(blank=True, editable=False, verbose_name='渲染后的正文'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_article_rendered_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='原图')),
+                ('width', models.PositiveSmallIntegerField(verbose_name='宽度')),
+                ('height', models.PositiveSmallIntegerField(verbose_name='高度')),
+                ('format', models.CharField(max_length=10, verbose_name='格式')),
+                ('name', models.CharField(max_length=255, verbose_name='文件')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='生成时间')),
+            ],
+            options={
+                'verbose_name': '图片缩略图',
+                'verbose_name_plural': '图片缩略图',
+                'ordering': ['source', 'format', 'width'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagevariant',
+            constraint=models.UniqueConstraint(fields=('source', 'format', 'width'), name='unique_image_variant'),
+        ),
+    ]
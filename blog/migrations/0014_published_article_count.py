@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-17 07:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_published_counts(apps, schema_editor):
+    Article = apps.get_model('blog', 'Article')
+    Category = apps.get_model('blog', 'Category')
+    CustomTag = apps.get_model('blog', 'CustomTag')
+    TaggedArticle = apps.get_model('blog', 'TaggedArticle')
+
+    category_counts = Article.objects.filter(
+        status='published',
+        category__isnull=False
+    ).values('category').annotate(n=Count('id')).order_by()
+    for row in category_counts:
+        Category.objects.filter(pk=row['category']).update(published_article_count=row['n'])
+
+    tag_counts = TaggedArticle.objects.filter(
+        content_type__app_label='blog',
+        content_type__model='article',
+        object_id__in=Article.objects.filter(status='published').values('pk')
+    ).values('tag').annotate(n=Count('id')).order_by()
+    for row in tag_counts:
+        CustomTag.objects.filter(pk=row['tag']).update(published_article_count=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_imagevariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_article_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customtag',
+            name='published_article_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_published_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-17 07:50
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    paths = {}
+
+    def path_of(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            # 数据中若已有环，把环上的分类当作根
+            if parent_id is None or parent_id in seen or parent_id not in parents:
+                paths[pk] = f'{pk}/'
+            else:
+                paths[pk] = path_of(parent_id, seen + (pk,)) + f'{pk}/'
+        return paths[pk]
+
+    for pk in parents:
+        path = path_of(pk)
+        Category.objects.filter(pk=pk).update(path=path, depth=path.count('/') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_published_article_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
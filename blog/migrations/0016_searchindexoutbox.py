@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='模型')),
+                ('object_id', models.CharField(max_length=64, verbose_name='对象ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='加入时间')),
+            ],
+            options={
+                'verbose_name': '搜索索引待更新',
+                'verbose_name_plural': '搜索索引待更新',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
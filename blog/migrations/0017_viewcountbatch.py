@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_searchindexoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewCountBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(max_length=64, unique=True, verbose_name='批次')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='写回时间')),
+            ],
+            options={
+                'verbose_name': '浏览量写回批次',
+                'verbose_name_plural': '浏览量写回批次',
+            },
+        ),
+    ]
@@ -2,8 +2,9 @@
 import random
 import string
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
@@ -11,6 +12,12 @@ from ckeditor.fields import RichTextField
 from taggit.managers import TaggableManager
 from taggit.models import TagBase, GenericTaggedItemBase
 
+from .categories import build_path, move_subtree, path_depth, path_ids
+from .content import analyze_content
+from .counters import exclude_count_field
+from .rendering import render_article
+from .slugs import allocate_slug, needs_slug
+
 
 class Category(models.Model):
     """文章分类"""
@@ -27,6 +34,11 @@ class Category(models.Model):
     )
     order = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # 由信号维护，见 blog/counters.py
+    published_article_count = models.PositiveIntegerField(default=0, editable=False)
+    # 从根到自身的主键路径和层级，保存时维护，见 blog/categories.py
+    path = models.CharField(max_length=255, default='', db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -38,21 +50,70 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('blog:category', kwargs={'slug': self.slug})
 
+    def get_descendants(self, include_self=True):
+        """子孙分类（一次前缀查询）"""
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def get_ancestors(self):
+        """上级分类，从根开始"""
+        ids = path_ids(self.path)[:-1]
+        return sorted(Category.objects.filter(pk__in=ids), key=lambda c: c.depth)
+
+    def _parent_path(self):
+        parent_path = self.parent.path if self.parent_id else ''
+        if self.pk and self.path and parent_path.startswith(self.path):
+            raise ValueError('不能把分类移动到自己或自己的子分类下')
+        return parent_path
+
+    def clean(self):
+        super().clean()
+        try:
+            self._parent_path()
+        except ValueError as e:
+            raise ValidationError({'parent': str(e)})
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        exclude_count_field(self, kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'parent' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+
+        parent_path = self._parent_path()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            path = build_path(parent_path, self.pk)
+            if path == self.path:
+                return
+            if self.path:
+                # 移动分类：整棵子树的路径一起改
+                move_subtree(self.path, path)
+            else:
+                Category.objects.filter(pk=self.pk).update(path=path, depth=path_depth(path))
+            self.path, self.depth = path, path_depth(path)
 
 
 class CustomTag(TagBase):
     """自定义标签"""
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # 由信号维护，见 blog/counters.py
+    published_article_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = "Tag"
         verbose_name_plural = "Tags"
 
+    def save(self, *args, **kwargs):
+        exclude_count_field(self, kwargs)
+        return super().save(*args, **kwargs)
+
 
 class TaggedArticle(GenericTaggedItemBase):
     """文章标签关联"""
@@ -63,6 +124,29 @@ class TaggedArticle(GenericTaggedItemBase):
     )
 
 
+# 自动生成的 slug 撞上唯一约束时的最多尝试次数
+SLUG_RETRIES = 3
+
+# 列表卡片用不到的大字段
+ARTICLE_LIST_DEFERRED_FIELDS = ('content', 'rendered_content', 'toc', 'meta_description', 'meta_keywords')
+
+# 只改动这些计数字段的保存不影响侧边栏和搜索索引
+COUNTER_FIELDS = {'view_count', 'like_count', 'comment_count'}
+
+# 内容分析和渲染写入的字段
+CONTENT_ANALYSIS_FIELDS = (
+    'word_count', 'reading_time', 'summary', 'toc', 'rendered_content', 'render_version'
+)
+
+
+class ArticleQuerySet(models.QuerySet):
+    """文章查询集"""
+
+    def for_list(self):
+        """列表投影：不读取正文等大字段，卡片只需要标题、摘要、图片、作者和计数"""
+        return self.defer(*ARTICLE_LIST_DEFERRED_FIELDS)
+
+
 class Article(models.Model):
     """博客文章"""
     STATUS_CHOICES = [
@@ -100,6 +184,13 @@ class Article(models.Model):
     like_count = models.PositiveIntegerField(default=0, verbose_name='点赞数')
     comment_count = models.PositiveIntegerField(default=0, verbose_name='评论数')
     reading_time = models.PositiveIntegerField(default=0, verbose_name='阅读时长(分钟)')
+    # 以下字段由保存时的内容分析生成，见 blog/content.py
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='字数')
+    summary = models.CharField(max_length=250, blank=True, editable=False, verbose_name='列表摘要')
+    toc = models.JSONField(default=list, blank=True, editable=False, verbose_name='目录')
+    # 清洗、高亮后的正文，见 blog/rendering.py
+    rendered_content = models.TextField(blank=True, editable=False, verbose_name='渲染后的正文')
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='渲染版本')
 
     # 文章状态
     status = models.CharField(
@@ -123,6 +214,8 @@ class Article(models.Model):
     allow_comments = models.BooleanField(default=True, verbose_name='允许评论')
     allow_sharing = models.BooleanField(default=True, verbose_name='允许分享')
 
+    objects = ArticleQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = '文章'
@@ -130,6 +223,9 @@ class Article(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', '-created_at'], name='blog_article_status_created'),
+            # 上一篇 / 下一篇导航，见 blog/navigation.py
+            models.Index(fields=['status', 'published_at', 'id'], name='blog_article_status_pub'),
             models.Index(fields=['is_featured']),
         ]
 
@@ -139,6 +235,14 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse('blog:article_detail', kwargs={'slug': self.slug})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库读出的状态和分类，保存时用来判断是否变化
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
+
     # def save(self, *args, **kwargs):
     #     # 自动生成 slug
     #     if not self.slug:
@@ -155,50 +259,44 @@ class Article(models.Model):
     #     super().save(*args, **kwargs)
 
     def save(self, *args, **kwargs):
-        # 1. 确保有有效的slug
-        if not self.slug or not self.slug.strip() or self.slug.startswith('-'):
-            base_slug = slugify(self.title) if self.title else 'untitled-article'
-
-            # 确保base_slug有效
-            if not base_slug or base_slug.startswith('-'):
-                base_slug = 'article'
-
-            # 生成唯一slug
-            counter = 1
-            original_slug = base_slug
-
-            while Article.objects.filter(slug=self.slug).exclude(id=self.id).exists() or not self.slug:
-                if counter == 1:
-                    self.slug = original_slug
-                else:
-                    self.slug = f"{original_slug}-{counter - 1}"
-
-                # 检查唯一性
-                if Article.objects.filter(slug=self.slug).exclude(id=self.id).exists():
-                    counter += 1
-                else:
-                    break
+        # 1. 确保有有效的slug（一次前缀查询找出空闲序号）
+        auto_slug = needs_slug(self.slug)
+        if auto_slug:
+            self.slug = allocate_slug(self.title, exclude_pk=self.pk)
 
         # 2. 设置发布时间（如果发布）
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
 
-        # 3. 计算阅读时长
-        if self.content:
-            # 简单字数统计
-            word_count = len(self.content)
-            self.reading_time = max(1, word_count // 200)
-            self.word_count = word_count
-        else:
-            self.reading_time = 1
-            self.word_count = 0
+        # 3. 分析并渲染正文：字数、阅读时长、摘要、目录和清洗后的 HTML（只更新计数字段时跳过）
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'content', 'excerpt'} & set(update_fields):
+            analyze_content(self)
+            render_article(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(CONTENT_ANALYSIS_FIELDS)
 
         # 4. 更新时间戳
         if not self.pk:
             self.created_at = timezone.now()
         self.updated_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        if not auto_slug:
+            super().save(*args, **kwargs)
+            return
+
+        # 并发保存可能分到同一个 slug，撞上唯一约束时重新分配
+        for attempt in range(SLUG_RETRIES):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == SLUG_RETRIES - 1 or not Article.objects.filter(
+                    slug=self.slug
+                ).exclude(pk=self.pk).exists():
+                    raise
+                self.slug = allocate_slug(self.title, exclude_pk=self.pk)
 
 
 class ArticleLike(models.Model):
@@ -245,6 +343,105 @@ class ArticleBookmark(models.Model):
         return f"{self.user} bookmarked {self.article}"
 
 
+class ArchiveMonth(models.Model):
+    """归档日历：每月已发布文章数，随发布、取消发布和删除维护"""
+    year = models.PositiveSmallIntegerField(verbose_name='年')
+    month = models.PositiveSmallIntegerField(verbose_name='月')
+    count = models.IntegerField(default=0, verbose_name='文章数')
+
+    class Meta:
+        verbose_name = '归档月份'
+        verbose_name_plural = '归档月份'
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='unique_archive_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} ({self.count})"
+
+
+class RelatedArticle(models.Model):
+    """相关文章：由 build_related_articles 离线计算的内容相似度排名"""
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='related_links',
+        verbose_name='文章'
+    )
+    related = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='related_backlinks',
+        verbose_name='相关文章'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    score = models.FloatField(verbose_name='相似度')
+
+    class Meta:
+        verbose_name = '相关文章'
+        verbose_name_plural = '相关文章'
+        ordering = ['article', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'related'], name='unique_related_article'),
+        ]
+        indexes = [
+            models.Index(fields=['article', 'rank'], name='blog_related_article_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class SearchIndexOutbox(models.Model):
+    """待更新搜索索引的对象，与修改在同一事务中写入，由 process_search_outbox 合并处理"""
+    model = models.CharField(max_length=100, verbose_name='模型')
+    object_id = models.CharField(max_length=64, verbose_name='对象ID')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='加入时间')
+
+    class Meta:
+        verbose_name = '搜索索引待更新'
+        verbose_name_plural = '搜索索引待更新'
+        ordering = ['pk']
+
+    def __str__(self):
+        return f"{self.model}.{self.object_id}"
+
+
+class ViewCountBatch(models.Model):
+    """已写回数据库的浏览量批次，与增量在同一事务中写入，同一批不会被写回两次"""
+    batch = models.CharField(max_length=64, unique=True, verbose_name='批次')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='写回时间')
+
+    class Meta:
+        verbose_name = '浏览量写回批次'
+        verbose_name_plural = '浏览量写回批次'
+
+    def __str__(self):
+        return self.batch
+
+
+class ImageVariant(models.Model):
+    """上传图片的缩略图，由 blog/images.py 在请求之外生成"""
+    source = models.CharField(max_length=255, verbose_name='原图')
+    width = models.PositiveSmallIntegerField(verbose_name='宽度')
+    height = models.PositiveSmallIntegerField(verbose_name='高度')
+    format = models.CharField(max_length=10, verbose_name='格式')
+    name = models.CharField(max_length=255, verbose_name='文件')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='生成时间')
+
+    class Meta:
+        verbose_name = '图片缩略图'
+        verbose_name_plural = '图片缩略图'
+        ordering = ['source', 'format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'format', 'width'], name='unique_image_variant'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.width}w {self.format}"
+
+
 # 在 models.py 末尾添加
 class SiteSettings(models.Model):
     """站点设置模型"""
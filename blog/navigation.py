@@ -0,0 +1,60 @@
+# blog/navigation.py
+"""
+上一篇 / 下一篇导航
+
+已发布文章按 (published_at, id) 排序，上一篇和下一篇各是一次走 (status, published_at, id)
+索引的查找（取紧挨着的一行），不需要维护额外的编号：发布、取消发布和删除都只改动文章自己这一行。
+已发布文章的 published_at 在发布时写入（Article.save 和批量发布）。
+"""
+from django.db.models import Q
+
+from .article_cache import bump_article_version
+
+
+def _neighbours(published_at, pk, queryset=None):
+    """(published_at, pk) 这个位置前后相邻的已发布文章（不含 pk 本身）"""
+    from .models import Article
+
+    if published_at is None:
+        return None, None
+    if queryset is None:
+        queryset = Article.objects.all()
+    queryset = queryset.filter(status='published')
+    previous = queryset.filter(
+        Q(published_at__lt=published_at) | Q(published_at=published_at, pk__lt=pk)
+    ).order_by('-published_at', '-pk').first()
+    following = queryset.filter(
+        Q(published_at__gt=published_at) | Q(published_at=published_at, pk__gt=pk)
+    ).order_by('published_at', 'pk').first()
+    return previous, following
+
+
+def get_adjacent_articles(article, queryset=None):
+    """返回 (上一篇, 下一篇)"""
+    if article.status != 'published':
+        return None, None
+    return _neighbours(article.published_at, article.pk, queryset)
+
+
+def bump_adjacent_articles(article):
+    """
+    使文章所在位置前后两篇的正文缓存失效（正文中包含上一篇 / 下一篇）
+
+    发布后调用时是新的相邻文章；取消发布或删除后调用时，原来的前一篇和后一篇现在互为相邻。
+    """
+    from .models import Article
+
+    for neighbour in _neighbours(article.published_at, article.pk, Article.objects.only('pk')):
+        if neighbour is not None:
+            bump_article_version(neighbour.pk)
+
+
+def bump_adjacent_to(rows):
+    """批量发布或删除后，使每篇文章 (pk, published_at) 位置前后文章的正文缓存失效"""
+    from .models import Article
+
+    queryset = Article.objects.only('pk')
+    for pk, published_at in rows:
+        for neighbour in _neighbours(published_at, pk, queryset):
+            if neighbour is not None:
+                bump_article_version(neighbour.pk)
@@ -0,0 +1,276 @@
+# blog/pagination.py
+from collections.abc import Sequence
+from functools import cached_property
+from math import ceil
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SALT = 'blog.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    """无效的分页游标"""
+    pass
+
+
+def _resolve_field(model, path):
+    """
+    沿着 a__b__c 路径找到模型字段
+
+    游标只支持非空的普通列：NULL 与任何值比较都不成立，可为空的字段会在翻页时丢行；
+    按外键排序时 Django 实际使用关联模型的默认排序，与游标里的值也对不上。
+    这样的排序返回 None，由调用方退回页码分页。
+    """
+    field = None
+    for part in path.split('__'):
+        if field is not None and not field.is_relation:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.null:
+            return None
+        if field.is_relation:
+            model = field.related_model
+    if field.is_relation:
+        return None
+    return field
+
+
+def normalize_ordering(queryset):
+    """
+    把查询集的排序规范成 [(字段, 是否降序)]，并在末尾补上主键保证排序唯一
+
+    无法使用游标的排序（表达式、随机排序、可为空的字段等）返回 None。
+    """
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    fields = []
+    for item in ordering:
+        if not isinstance(item, str) or item == '?':
+            # 表达式或随机排序无法生成游标
+            return None
+        descending = item.startswith('-')
+        name = item.lstrip('-+')
+        if name == 'pk':
+            name = 'id'
+        if _resolve_field(queryset.model, name) is None:
+            return None
+        fields.append((name, descending))
+
+    if not any(name == 'id' for name, _ in fields):
+        descending = fields[0][1] if fields else True
+        fields.append(('id', descending))
+    return fields
+
+
+def _resolve_value(obj, path):
+    """沿着 a__b__c 路径取实例上的值"""
+    for part in path.split('__'):
+        obj = getattr(obj, part)
+    return obj
+
+
+class CursorPage(Sequence):
+    """游标分页的一页结果"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage %s>' % self.number
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[-1], self.number + 1)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[0], self.number - 1)
+
+
+class CursorPaginator:
+    """
+    基于 (排序字段, id) 的键集分页器
+
+    翻页时用 WHERE (key) < (上一页最后一行的 key) 代替 OFFSET，
+    每页只取 per_page + 1 行判断是否还有下一页，不执行 COUNT(*)，
+    因此第 500 页和第 1 页的开销相同。
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.per_page = int(per_page)
+        self.ordering = ordering or normalize_ordering(queryset)
+        self.queryset = queryset.order_by(*self._order_by(reverse=False))
+        self.fields = [
+            _resolve_field(queryset.model, name) for name, _ in self.ordering
+        ]
+
+    def _order_by(self, reverse):
+        return [
+            ('-' if descending != reverse else '') + name
+            for name, descending in self.ordering
+        ]
+
+    @cached_property
+    def count(self):
+        """总数只在模板真正用到时才查询"""
+        return self.queryset.count()
+
+    @cached_property
+    def num_pages(self):
+        if not self.count:
+            return 1
+        return ceil(self.count / self.per_page)
+
+    def encode_cursor(self, obj, number):
+        values = []
+        for (name, _), field in zip(self.ordering, self.fields):
+            value = field.get_prep_value(_resolve_value(obj, name))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return signing.dumps(
+            {'o': self._order_by(reverse=False), 'v': values, 'n': number},
+            salt=CURSOR_SALT, compress=True,
+        )
+
+    def decode_cursor(self, token):
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT)
+            # 游标中的值按生成时的排序排列，换了排序（如修改了 ?sort=）就不能再用
+            if data['o'] != self._order_by(reverse=False):
+                raise InvalidCursor('游标与当前排序不匹配')
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, data['v'])
+            ]
+            number = int(data['n'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError) as e:
+            raise InvalidCursor(str(e))
+        if len(values) != len(self.ordering) or number < 1:
+            raise InvalidCursor('游标与当前排序不匹配')
+        return values, number
+
+    def _seek(self, values, reverse):
+        """构造 (f1, f2, ...) 在排序方向上严格位于 values 之后的条件"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (prev_name, _) in enumerate(self.ordering[:i]):
+                clause &= Q(**{prev_name: values[j]})
+            condition |= clause
+        return condition
+
+    def page(self, after=None, before=None):
+        if before:
+            values, number = self.decode_cursor(before)
+            rows = list(
+                self.queryset.filter(self._seek(values, reverse=True))
+                .order_by(*self._order_by(reverse=True))[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            number = max(number, 2) if has_previous else 1
+            return CursorPage(rows, number, self,
+                              has_next=True, has_previous=has_previous)
+
+        if after:
+            values, number = self.decode_cursor(after)
+            queryset = self.queryset.filter(self._seek(values, reverse=False))
+        else:
+            number = 1
+            queryset = self.queryset
+
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], number, self,
+                          has_next=has_next, has_previous=number > 1)
+
+
+class CursorPaginationMixin:
+    """
+    列表视图共用的分页逻辑
+
+    默认使用游标分页（?after= / ?before=），不计算总数；
+    旧的 ?page= 链接或关闭游标分页时退回页码分页，并提供省略中间页码的分页栏。
+    """
+    cursor_pagination = None
+    after_kwarg = 'after'
+    before_kwarg = 'before'
+
+    def use_cursor_pagination(self):
+        enabled = self.cursor_pagination
+        if enabled is None:
+            enabled = getattr(settings, 'BLOG_CURSOR_PAGINATION', True)
+        if not enabled:
+            return False
+        # 兼容旧的页码链接
+        return self.page_kwarg not in self.request.GET and self.page_kwarg not in self.kwargs
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = normalize_ordering(queryset) if self.use_cursor_pagination() else None
+        if ordering is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size, ordering)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get(self.after_kwarg),
+                before=self.request.GET.get(self.before_kwarg),
+            )
+        except InvalidCursor:
+            raise Http404('无效的分页参数')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        paginator = context.get('paginator')
+
+        # 翻页时保留筛选、排序等其它查询参数
+        params = self.request.GET.copy()
+        for key in (self.page_kwarg, self.after_kwarg, self.before_kwarg):
+            params.pop(key, None)
+        query = urlencode(list(params.lists()), doseq=True)
+        context['page_querystring'] = query + '&' if query else ''
+
+        if isinstance(paginator, Paginator) and page is not None:
+            context['page_range'] = paginator.get_elided_page_range(
+                page.number, on_each_side=2, on_ends=1
+            )
+            context['page_ellipsis'] = Paginator.ELLIPSIS
+        return context
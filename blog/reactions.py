@@ -0,0 +1,277 @@
+# blog/reactions.py
+"""
+文章点赞和收藏
+
+Redis 中每篇文章一个点赞集合、一个收藏集合，成员是用户ID，
+切换和是否已点赞的判断都是 O(1)，点赞数就是集合的基数。
+变化记录在待写回哈希里，由 ``python manage.py flush_reactions`` 批量写入
+ArticleLike / ArticleBookmark，并按真实行数重算 like_count，计数不会漂移。
+没有 Redis 时直接读写数据库。
+"""
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .user_stats import adjust_user_stat
+
+REACTION_SET_KEY = 'blog:%s:%s'
+PENDING_KEY = 'blog:reactions:pending'
+FLUSHING_KEY = 'blog:reactions:flushing'
+
+# 集合中的占位成员，表示已经从数据库加载过（空集合在 Redis 中不存在）
+LOADED = '-'
+
+# 切换（ARGV[3] 为空）或设置成员并记录待写回的变化，集合尚未加载时返回 -1
+TOGGLE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local active
+if ARGV[3] == '' then
+    active = 1 - redis.call('SISMEMBER', KEYS[1], ARGV[1])
+else
+    active = tonumber(ARGV[3])
+end
+if active == 1 then
+    redis.call('SADD', KEYS[1], ARGV[1])
+else
+    redis.call('SREM', KEYS[1], ARGV[1])
+end
+redis.call('HSET', KEYS[2], ARGV[2], active)
+return {active, redis.call('SCARD', KEYS[1]) - 1}
+"""
+
+
+def _reaction_models():
+    from .models import ArticleBookmark, ArticleLike
+    # 类型 -> (模型, 文章上的计数字段, 用户计数名)
+    return {
+        'likes': (ArticleLike, 'like_count', None),
+        'bookmarks': (ArticleBookmark, None, 'bookmark_count'),
+    }
+
+
+def sync_like_counts(article_ids):
+    """按 ArticleLike 的真实行数重算 like_count"""
+    from .models import Article, ArticleLike
+
+    article_ids = list(article_ids)
+    if not article_ids:
+        return 0
+    likes = ArticleLike.objects.filter(
+        article=OuterRef('pk')
+    ).order_by().values('article').annotate(n=Count('id')).values('n')
+    return Article.objects.filter(pk__in=article_ids).update(
+        like_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0)
+    )
+
+
+def apply_reactions(changes):
+    """
+    把 {(类型, 文章ID, 用户ID): 是否有效} 写入数据库，返回涉及的文章数
+
+    已存在的不重复创建，不存在的不删除，重复写回同一批变化是安全的。
+    """
+    articles = set()
+    with transaction.atomic():
+        for kind, (model, count_field, stat) in _reaction_models().items():
+            wanted = {
+                (article_id, user_id): active
+                for (k, article_id, user_id), active in changes.items()
+                if k == kind
+            }
+            if not wanted:
+                continue
+            article_ids = {article_id for article_id, _ in wanted}
+            user_ids = {user_id for _, user_id in wanted}
+            existing = {
+                (article_id, user_id): pk
+                for pk, article_id, user_id in model.objects.filter(
+                    article_id__in=article_ids,
+                    user_id__in=user_ids
+                ).values_list('pk', 'article_id', 'user_id')
+            }
+
+            created = [pair for pair, active in wanted.items() if active and pair not in existing]
+            model.objects.bulk_create([
+                model(article_id=article_id, user_id=user_id)
+                for article_id, user_id in created
+            ], ignore_conflicts=True)
+            # bulk_create 不发送 post_save 信号，删除会发送
+            if stat:
+                for user_id, n in Counter(user_id for _, user_id in created).items():
+                    adjust_user_stat(user_id, stat, n)
+
+            removed = [existing[pair] for pair, active in wanted.items() if not active and pair in existing]
+            if removed:
+                model.objects.filter(pk__in=removed).delete()
+
+            if count_field:
+                sync_like_counts(article_ids)
+            articles |= article_ids
+    return len(articles)
+
+
+class RedisReactionStore:
+    """点赞 / 收藏集合保存在 Redis，变化批量写回"""
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def _load(self, kind, article_id):
+        """从数据库加载集合；只在集合不存在时生效，避免覆盖其他进程的切换"""
+        model = _reaction_models()[kind][0]
+        client = self.client
+        key = REACTION_SET_KEY % (kind, article_id)
+        temp = f'{key}:loading:{uuid.uuid4().hex}'
+
+        user_ids = list(model.objects.filter(article_id=article_id).values_list('user_id', flat=True))
+        pipe = client.pipeline()
+        pipe.sadd(temp, LOADED)
+        for start in range(0, len(user_ids), 1000):
+            pipe.sadd(temp, *user_ids[start:start + 1000])
+        pipe.renamenx(temp, key)
+        pipe.delete(temp)
+        pipe.execute()
+
+    def toggle(self, kind, article_id, user_id, active=None):
+        """切换（或按 active 设置）用户的点赞 / 收藏，返回 (是否有效, 数量)"""
+        client = self.client
+        keys = [REACTION_SET_KEY % (kind, article_id), PENDING_KEY]
+        args = [user_id, f'{kind}:{article_id}:{user_id}', '' if active is None else int(active)]
+        result = client.eval(TOGGLE_SCRIPT, len(keys), *keys, *args)
+        if result == -1:
+            self._load(kind, article_id)
+            result = client.eval(TOGGLE_SCRIPT, len(keys), *keys, *args)
+        active, count = result
+        return bool(active), count
+
+    def remove_many(self, kind, user_id, article_ids):
+        """取消用户对多篇文章的点赞 / 收藏，返回实际取消的个数"""
+        article_ids = list(article_ids)
+        removed = 0
+        while article_ids:
+            pipe = self.client.pipeline()
+            for article_id in article_ids:
+                pipe.eval(
+                    TOGGLE_SCRIPT, 2,
+                    REACTION_SET_KEY % (kind, article_id), PENDING_KEY,
+                    user_id, f'{kind}:{article_id}:{user_id}', 0
+                )
+            unloaded = []
+            for article_id, result in zip(article_ids, pipe.execute()):
+                if result == -1:
+                    self._load(kind, article_id)
+                    unloaded.append(article_id)
+                else:
+                    removed += 1
+            article_ids = unloaded
+        return removed
+
+    def state(self, article_id, user_id=None):
+        """返回 {'liked', 'bookmarked', 'like_count'}，集合未加载时先加载"""
+        keys = {kind: REACTION_SET_KEY % (kind, article_id) for kind in ('likes', 'bookmarks')}
+        pipe = self.client.pipeline()
+        for key in keys.values():
+            pipe.exists(key)
+            pipe.sismember(key, user_id or LOADED)
+        pipe.scard(keys['likes'])
+        likes_exist, liked, bookmarks_exist, bookmarked, like_count = pipe.execute()
+
+        if not likes_exist or not bookmarks_exist:
+            for kind, exists in (('likes', likes_exist), ('bookmarks', bookmarks_exist)):
+                if not exists:
+                    self._load(kind, article_id)
+            return self.state(article_id, user_id)
+
+        return {
+            'liked': bool(user_id and liked),
+            'bookmarked': bool(user_id and bookmarked),
+            'like_count': like_count - 1,
+        }
+
+    def flush(self):
+        from redis.exceptions import ResponseError
+
+        client = self.client
+        # 上次写回中断时先处理遗留的那一批
+        if not client.exists(FLUSHING_KEY):
+            try:
+                client.rename(PENDING_KEY, FLUSHING_KEY)
+            except ResponseError:
+                return 0
+
+        changes = {}
+        for field, active in client.hgetall(FLUSHING_KEY).items():
+            kind, article_id, user_id = field.decode().split(':')
+            changes[(kind, int(article_id), int(user_id))] = active == b'1'
+        flushed = apply_reactions(changes)
+        client.delete(FLUSHING_KEY)
+        return flushed
+
+
+class DatabaseReactionStore:
+    """没有 Redis 时的实现，每次切换直接写数据库"""
+
+    def toggle(self, kind, article_id, user_id, active=None):
+        model, count_field, _ = _reaction_models()[kind]
+        with transaction.atomic():
+            deleted = 0
+            if not active:
+                deleted, _ = model.objects.filter(article_id=article_id, user_id=user_id).delete()
+            if active or (active is None and not deleted):
+                model.objects.get_or_create(article_id=article_id, user_id=user_id)
+                active = True
+            if count_field:
+                sync_like_counts([article_id])
+        return bool(active), model.objects.filter(article_id=article_id).count()
+
+    def remove_many(self, kind, user_id, article_ids):
+        from .bulk import bulk_operation
+
+        model, count_field, stat = _reaction_models()[kind]
+        article_ids = list(article_ids)
+        with transaction.atomic(), bulk_operation():
+            removed, _ = model.objects.filter(article_id__in=article_ids, user_id=user_id).delete()
+            if stat:
+                adjust_user_stat(user_id, stat, -removed)
+            if count_field:
+                sync_like_counts(article_ids)
+        return removed
+
+    def state(self, article_id, user_id=None):
+        from .models import Article, ArticleBookmark, ArticleLike
+
+        state = {
+            'liked': False,
+            'bookmarked': False,
+            'like_count': Article.objects.filter(pk=article_id).values_list('like_count', flat=True).first(),
+        }
+        if user_id:
+            state['liked'] = ArticleLike.objects.filter(article_id=article_id, user_id=user_id).exists()
+            state['bookmarked'] = ArticleBookmark.objects.filter(article_id=article_id, user_id=user_id).exists()
+        return state
+
+    def flush(self):
+        return 0
+
+
+_store = None
+
+
+def get_reaction_store():
+    """按配置返回点赞 / 收藏存储（进程内单例）"""
+    global _store
+    if _store is None:
+        backend = getattr(settings, 'BLOG_REACTION_BACKEND', None)
+        if backend is None:
+            cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            backend = 'redis' if 'django_redis' in cache_backend else 'database'
+        _store = RedisReactionStore() if backend == 'redis' else DatabaseReactionStore()
+    return _store
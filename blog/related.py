@@ -0,0 +1,249 @@
+# blog/related.py
+"""
+相关文章离线计算
+
+把已发布文章的标题、摘要、正文、标签和分类转成 TF-IDF 稀疏向量（NumPy / SciPy），
+按余弦相似度为每篇文章取前 top_k 篇写入 RelatedArticle，详情页只读这张表。
+增量模式只重算上次计算之后修改过的文章，以及可能因它们而变化的文章。
+"""
+import re
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from .article_cache import bump_article_version
+from .content import CJK_CHARS
+from .search_analysis import cjk_grams
+
+RELATED_BUILT_AT_KEY = 'blog:related:built_at'
+
+WORD_RE = re.compile(r'[a-z0-9]{2,}')
+# 与搜索索引的二元分词使用同一个字符范围
+CJK_RE = re.compile(f'[{CJK_CHARS}]+')
+
+# 标签和分类比正文词更能说明主题，按重复次数加权
+TAG_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+
+
+def get_top_k():
+    return getattr(settings, 'BLOG_RELATED_ARTICLES_TOP_K', 6)
+
+
+def tokenize(text):
+    """英文按单词切分，中日韩文字按相邻两个字切分（同搜索索引的 cjk_grams）"""
+    text = strip_tags(text or '').lower()
+    tokens = WORD_RE.findall(text)
+    for run in CJK_RE.findall(text):
+        tokens.extend(gram for gram, _ in cjk_grams(run))
+    return tokens
+
+
+def article_tokens(title, excerpt, content, category_id, tag_names):
+    tokens = tokenize(title) * 2 + tokenize(excerpt) + tokenize(content)
+    tokens += [f'tag:{name.lower()}' for name in tag_names] * TAG_WEIGHT
+    if category_id:
+        tokens += [f'category:{category_id}'] * CATEGORY_WEIGHT
+    return tokens
+
+
+def build_matrix(documents, max_df=0.5, max_terms=64):
+    """
+    文档（词列表）转成按行 L2 归一化的 TF-IDF 矩阵
+
+    出现在超过 max_df 比例文档中的词没有区分度，直接丢弃；
+    每篇文档只保留权重最高的 max_terms 个词，让相似度矩阵保持稀疏。
+    """
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    for tokens in documents:
+        for token in tokens:
+            indices.append(vocabulary.setdefault(token, len(vocabulary)))
+        indptr.append(len(indices))
+
+    n_docs = len(documents)
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.array(indices, dtype=np.int64), indptr),
+        shape=(n_docs, len(vocabulary))
+    )
+    counts.sum_duplicates()
+
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n_docs) / (1 + df)).astype(np.float32) + 1
+    idf[df > max(1, max_df * n_docs)] = 0
+
+    # 次线性词频
+    counts.data = (1 + np.log(counts.data)) * idf[counts.indices]
+    counts.eliminate_zeros()
+
+    for row in range(n_docs):
+        start, end = counts.indptr[row], counts.indptr[row + 1]
+        if end - start > max_terms:
+            values = counts.data[start:end]
+            values[np.argsort(values)[:end - start - max_terms]] = 0
+    counts.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ counts, dtype=np.float32)
+
+
+def top_k_neighbours(matrix, rows, top_k, chunk_size=512):
+    """返回 {行号: [(列号, 相似度), ...]}，按相似度从高到低，不含自身"""
+    transposed = matrix.T.tocsc()
+    rows = np.asarray(rows, dtype=np.int64)
+    result = {}
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        product = (matrix[chunk] @ transposed).tocsr()
+        for i, row in enumerate(chunk):
+            start, end = product.indptr[i], product.indptr[i + 1]
+            cols = product.indices[start:end]
+            scores = product.data[start:end]
+            keep = cols != row
+            cols, scores = cols[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                cols, scores = cols[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            result[int(row)] = [(int(cols[j]), float(scores[j])) for j in order]
+    return result
+
+
+def load_documents():
+    """读取全部已发布文章，返回 (文章ID数组, 词列表)"""
+    from .models import Article, TaggedArticle
+
+    tag_names = {}
+    for article_id, name in TaggedArticle.objects.filter(
+        content_type__app_label='blog',
+        content_type__model='article'
+    ).values_list('object_id', 'tag__name'):
+        tag_names.setdefault(article_id, []).append(name)
+
+    ids = []
+    documents = []
+    for pk, title, excerpt, content, category_id in Article.objects.filter(
+        status='published'
+    ).order_by('pk').values_list('pk', 'title', 'excerpt', 'content', 'category_id').iterator():
+        ids.append(pk)
+        documents.append(article_tokens(title, excerpt, content, category_id, tag_names.get(pk, ())))
+    return np.array(ids, dtype=np.int64), documents
+
+
+def _changed_rows(ids, matrix, since, top_k):
+    """增量模式下需要重算的行：修改过的文章、引用了它们的文章，以及它们可能挤进前 top_k 的文章"""
+    from .models import Article, RelatedArticle
+
+    position = {pk: row for row, pk in enumerate(ids.tolist())}
+    changed = set(Article.objects.filter(
+        status='published',
+        updated_at__gt=since
+    ).values_list('pk', flat=True))
+    # 列表里有已删除或已取消发布的文章
+    stale = set(RelatedArticle.objects.exclude(
+        related__status='published'
+    ).values_list('article_id', flat=True))
+    changed_rows = [position[pk] for pk in changed if pk in position]
+
+    affected = set(changed) | stale
+    affected |= set(RelatedArticle.objects.filter(
+        related_id__in=changed
+    ).values_list('article_id', flat=True))
+
+    if changed_rows:
+        # 相似度对称：看哪些文章与修改过的文章的相似度超过了它们当前的第 top_k 名
+        current = {}
+        counts = {}
+        for article_id, n, lowest in RelatedArticle.objects.values('article_id').annotate(
+            n=Count('id'),
+            lowest=Min('score')
+        ).values_list('article_id', 'n', 'lowest'):
+            counts[article_id] = n
+            current[article_id] = lowest
+        product = (matrix[changed_rows] @ matrix.T).tocoo()
+        for col, score in zip(product.col.tolist(), product.data.tolist()):
+            pk = int(ids[col])
+            if counts.get(pk, 0) < top_k or score > current[pk]:
+                affected.add(pk)
+
+    return [position[pk] for pk in affected if pk in position]
+
+
+def compute_related_articles(full=False, top_k=None, chunk_size=512):
+    """计算相关文章并写入 RelatedArticle，返回更新的文章数"""
+    from .models import RelatedArticle
+
+    top_k = top_k or get_top_k()
+    started_at = timezone.now()
+    since = None if full else cache.get(RELATED_BUILT_AT_KEY)
+
+    ids, documents = load_documents()
+    if not len(ids):
+        RelatedArticle.objects.all().delete()
+        cache.set(RELATED_BUILT_AT_KEY, started_at, None)
+        return 0
+
+    matrix = build_matrix(documents)
+    if since is None:
+        rows = range(len(ids))
+    else:
+        rows = _changed_rows(ids, matrix, since, top_k)
+    neighbours = top_k_neighbours(matrix, rows, top_k, chunk_size)
+
+    article_ids = [int(ids[row]) for row in neighbours]
+    with transaction.atomic():
+        if since is None:
+            RelatedArticle.objects.all().delete()
+        else:
+            RelatedArticle.objects.filter(article_id__in=article_ids).delete()
+            RelatedArticle.objects.exclude(article__status='published').delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(
+                article_id=int(ids[row]),
+                related_id=int(ids[col]),
+                rank=rank,
+                score=score
+            )
+            for row, items in neighbours.items()
+            for rank, (col, score) in enumerate(items, start=1)
+        ], batch_size=1000)
+
+    # 相关文章在正文缓存里
+    for article_id in article_ids:
+        bump_article_version(article_id)
+
+    cache.set(RELATED_BUILT_AT_KEY, started_at, None)
+    return len(article_ids)
+
+
+def benchmark(n_articles, n_terms=200, vocabulary_size=50000, top_k=6, seed=0):
+    """用 Zipf 分布的随机词生成文档，返回各阶段耗时（秒）"""
+    rng = np.random.default_rng(seed)
+    timings = {}
+
+    start = time.perf_counter()
+    words = rng.zipf(1.2, size=(n_articles, n_terms)) % vocabulary_size
+    documents = [row.tolist() for row in words]
+    for i, document in enumerate(documents):
+        document.append(f'tag:{rng.integers(500)}')
+        document.append(f'category:{i % 20}')
+    timings['generate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = build_matrix(documents)
+    timings['vectorize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top_k_neighbours(matrix, range(n_articles), top_k)
+    timings['top_k'] = time.perf_counter() - start
+    timings['nnz'] = matrix.nnz
+    return timings
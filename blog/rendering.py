@@ -0,0 +1,107 @@
+# blog/rendering.py
+"""
+文章正文渲染
+
+保存时把 CKEditor 的内容渲染一次：给 h2~h4 标题补上目录锚点，按白名单清洗 HTML，
+用 Pygments 在服务端高亮代码块，给图片加上懒加载属性。结果连同渲染流程的版本号存入 rendered_content / render_version，
+详情页直接输出；渲染流程修改后把 RENDER_VERSION 加一，再运行 render_articles 命令重新渲染。
+"""
+import html
+import re
+
+import nh3
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
+
+from .content import add_heading_anchors
+
+# 渲染流程的版本号，修改清洗规则或高亮方式时加一
+RENDER_VERSION = 2
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'code', 'del', 'div', 'em',
+    'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img',
+    'ins', 'kbd', 'li', 'mark', 'ol', 'p', 'pre', 's', 'small', 'span', 'strike',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr',
+    'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'style', 'title'},
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'code': {'class'},
+    'h2': {'id'},
+    'h3': {'id'},
+    'h4': {'id'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start'},
+}
+# CKEditor 的对齐和缩进会写在 style 里
+ALLOWED_STYLES = {'text-align', 'margin-left', 'float', 'width', 'height'}
+URL_SCHEMES = {'http', 'https', 'mailto'}
+
+CODE_BLOCK_RE = re.compile(
+    r'<pre>\s*<code(?: class="language-([\w+#-]+)")?>(.*?)</code>\s*</pre>',
+    re.DOTALL
+)
+IMG_RE = re.compile(r'<img(?![^>]*\sloading=)([^>]*?)(\s*/?)>', re.IGNORECASE)
+
+FORMATTER = HtmlFormatter(cssclass='highlight')
+
+
+def sanitize(content):
+    """按白名单清洗 HTML"""
+    return nh3.clean(
+        content or '',
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=URL_SCHEMES,
+        filter_style_properties=ALLOWED_STYLES,
+        link_rel='noopener noreferrer nofollow',
+    )
+
+
+def highlight_code_blocks(content):
+    """把 CodeSnippet 插件生成的 <pre><code class="language-xx"> 替换成 Pygments 的高亮结果"""
+    def replace(match):
+        language, code = match.group(1), html.unescape(match.group(2))
+        try:
+            lexer = get_lexer_by_name(language) if language else TextLexer()
+        except ClassNotFound:
+            lexer = TextLexer()
+        return highlight(code, lexer, FORMATTER)
+
+    return CODE_BLOCK_RE.sub(replace, content)
+
+
+def lazy_images(content):
+    """图片默认懒加载"""
+    return IMG_RE.sub(r'<img loading="lazy" decoding="async"\1\2>', content)
+
+
+def render_content(content):
+    """标题锚点 -> 清洗 -> 高亮 -> 懒加载，返回可以直接输出的 HTML"""
+    # 锚点加在原始内容上，与 analyze_content 生成的目录一致
+    content, _ = add_heading_anchors(content)
+    return lazy_images(highlight_code_blocks(sanitize(content)))
+
+
+def render_article(article):
+    """渲染文章正文并写回文章对象（不保存）"""
+    article.rendered_content = render_content(article.content)
+    article.render_version = RENDER_VERSION
+    return article
+
+
+def get_rendered_content(article):
+    """取渲染结果；渲染流程升级后、尚未重新渲染的文章临时现场渲染"""
+    if article.render_version == RENDER_VERSION:
+        return article.rendered_content
+    return render_content(article.content)
+
+
+def pygments_css():
+    return FORMATTER.get_style_defs('.highlight')
@@ -0,0 +1,191 @@
+# blog/search_analysis.py
+"""
+搜索索引的分词
+
+Whoosh 默认的 StemmingAnalyzer 按空白和标点切词，一整句中文会成为一个词，搜“数据库”找不到
+“优化数据库查询”。CJK 二元分词把连续的中日韩文字切成相邻两字一组（建索引时另加单字，
+单字查询也能命中），拉丁文字仍按词切分、转小写、去停用词、取词干。
+BLOG_SEARCH_ANALYZER 选择 ArticleIndex.text 使用的分词方式，修改后需要重建索引：
+'bigram'（默认）、'jieba'（词典分词，需要安装 jieba）、'stemming'（Whoosh 默认）。
+"""
+import random
+import re
+import sqlite3
+import statistics
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from whoosh.analysis import (
+    LowercaseFilter, StemFilter, StemmingAnalyzer, StopFilter, Token, Tokenizer,
+)
+
+from .content import CJK_CHARS
+
+TOKEN_PATTERN = re.compile(rf'([{CJK_CHARS}]+)|[^\W{CJK_CHARS}]+')
+
+
+def cjk_grams(run, unigrams=False):
+    """连续 CJK 文字的二元组 [(文本, 在 run 中的位置)]；只有一个字时返回单字"""
+    if len(run) == 1:
+        return [(run, 0)]
+    grams = [(run[i:i + 2], i) for i in range(len(run) - 1)]
+    if unigrams:
+        grams += [(char, i) for i, char in enumerate(run)]
+        grams.sort(key=lambda gram: (gram[1], -len(gram[0])))
+    return grams
+
+
+class CJKBigramTokenizer(Tokenizer):
+    """拉丁文字按词切分，CJK 文字切成二元组；建索引时（mode='index'）另加单字"""
+
+    def __call__(self, value, positions=False, chars=False, keeporiginal=False,
+                 removestops=True, start_pos=0, start_char=0, tokenize=True,
+                 mode='', **kwargs):
+        token = Token(positions, chars, removestops=removestops, mode=mode, **kwargs)
+        if not tokenize:
+            token.original = token.text = value
+            token.boost = 1.0
+            if positions:
+                token.pos = start_pos
+            if chars:
+                token.startchar = start_char
+                token.endchar = start_char + len(value)
+            yield token
+            return
+
+        pos = start_pos
+        for match in TOKEN_PATTERN.finditer(value):
+            if match.group(1) is None:
+                pieces = [(match.group(), 0)]
+            else:
+                pieces = cjk_grams(match.group(), unigrams=mode == 'index')
+            for text, offset in pieces:
+                token.text = text
+                token.boost = 1.0
+                token.stopped = False
+                if keeporiginal:
+                    token.original = text
+                if positions:
+                    token.pos = pos
+                    pos += 1
+                if chars:
+                    token.startchar = start_char + match.start() + offset
+                    token.endchar = token.startchar + len(text)
+                yield token
+
+
+def CJKBigramAnalyzer():
+    # 单个汉字也是有效的词，停用词过滤不按长度丢弃
+    return CJKBigramTokenizer() | LowercaseFilter() | StopFilter(minsize=1) | StemFilter()
+
+
+def get_analyzer(name=None):
+    name = name or getattr(settings, 'BLOG_SEARCH_ANALYZER', 'bigram')
+    if name == 'bigram':
+        return CJKBigramAnalyzer()
+    if name == 'stemming':
+        return StemmingAnalyzer()
+    if name == 'jieba':
+        try:
+            from jieba.analyse import ChineseAnalyzer
+        except ImportError:
+            raise ImproperlyConfigured("BLOG_SEARCH_ANALYZER = 'jieba' 需要安装 jieba")
+        return ChineseAnalyzer()
+    raise ImproperlyConfigured(f'未知的 BLOG_SEARCH_ANALYZER: {name!r}')
+
+
+BENCHMARK_LATIN = 'Django Python Redis MySQL Whoosh Nginx Docker Celery'.split()
+
+
+def _benchmark_corpus(n_documents, n_words, rng, vocabulary_size=5000):
+    """由随机的两三字词组成、不加空格的中文文档，词频服从 Zipf 分布；返回 (文档, 词表)"""
+    chars = [chr(0x4e00 + rng.randrange(3000)) for _ in range(800)]
+    vocabulary = list(dict.fromkeys(
+        ''.join(rng.choice(chars) for _ in range(rng.choice((2, 2, 3))))
+        for _ in range(vocabulary_size)
+    )) + BENCHMARK_LATIN
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(vocabulary))]
+    rng.shuffle(weights)
+    documents = []
+    for _ in range(n_documents):
+        words = rng.choices(vocabulary, weights, k=n_words)
+        documents.append(''.join(f' {word} ' if word.isascii() else word for word in words) + '。')
+    return documents, vocabulary
+
+
+def _timed(func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'median_ms': statistics.median(timings) * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95) - 1] * 1000,
+    }
+
+
+def benchmark(n_documents=3000, n_words=120, n_queries=200, analyzers=('stemming', 'bigram'), seed=0):
+    """
+    在内存中生成中文语料，比较 LIKE 子串匹配与各分词方式的 Whoosh 索引
+
+    LIKE 的结果即为标准答案（召回率 100%），各分词方式报告召回率和准确率；
+    耗时按搜索页的实际操作计：取第一页 10 条并统计命中总数。
+    """
+    from whoosh.fields import ID, TEXT, Schema
+    from whoosh.filedb.filestore import RamStorage
+    from whoosh.qparser import QueryParser
+
+    rng = random.Random(seed)
+    documents, vocabulary = _benchmark_corpus(n_documents, n_words, rng)
+    queries = rng.sample(vocabulary, n_queries)
+    report = {}
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE article (id INTEGER PRIMARY KEY, content TEXT)')
+    db.executemany('INSERT INTO article VALUES (?, ?)', enumerate(documents))
+
+    def like_page(query):
+        pattern = f'%{query}%'
+        db.execute('SELECT COUNT(*) FROM article WHERE content LIKE ?', (pattern,)).fetchone()
+        return db.execute(
+            'SELECT id FROM article WHERE content LIKE ? ORDER BY id DESC LIMIT 10', (pattern,)
+        ).fetchall()
+
+    truth = [
+        {row[0] for row in db.execute('SELECT id FROM article WHERE content LIKE ?', (f'%{query}%',))}
+        for query in queries
+    ]
+    report['like'] = dict(_timed(like_page, queries), recall=1.0, precision=1.0)
+
+    for name in analyzers:
+        index = RamStorage().create_index(Schema(id=ID(stored=True), text=TEXT(analyzer=get_analyzer(name))))
+        start = time.perf_counter()
+        writer = index.writer()
+        for pk, document in enumerate(documents):
+            writer.add_document(id=str(pk), text=document)
+        writer.commit()
+        build = time.perf_counter() - start
+
+        parser = QueryParser('text', index.schema)
+        with index.searcher() as searcher:
+            def index_page(query):
+                results = searcher.search(parser.parse(query), limit=10)
+                len(results)
+                return [hit['id'] for hit in results]
+
+            timings = _timed(index_page, queries)
+            hits = [
+                {int(hit['id']) for hit in searcher.search(parser.parse(query), limit=None)}
+                for query in queries
+            ]
+        found = sum(len(expected & got) for expected, got in zip(truth, hits))
+        report[name] = dict(
+            timings,
+            recall=found / max(sum(len(expected) for expected in truth), 1),
+            precision=found / max(sum(len(got) for got in hits), 1),
+            build_s=build,
+        )
+    return report
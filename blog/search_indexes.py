@@ -1,18 +1,39 @@
 # blog/search_indexes.py
 from haystack import indexes
 from .models import Article  # 导入你的博客文章模型
+from .search_analysis import get_analyzer
 
 class ArticleIndex(indexes.SearchIndex, indexes.Indexable):
     # 定义搜索字段（text是默认的全文搜索字段）
-    text = indexes.CharField(document=True, use_template=True)
+    # 中文按二元组分词（见 BLOG_SEARCH_ANALYZER）
+    text = indexes.CharField(document=True, use_template=True, analyzer=get_analyzer())
     # 可以添加其他要索引的字段（比如标题、内容）
     title = indexes.CharField(model_attr='title')
     content = indexes.CharField(model_attr='content')
+    excerpt = indexes.CharField(model_attr='excerpt', null=True)
+    # 高级搜索的筛选和排序字段
+    category = indexes.CharField(model_attr='category__slug', null=True)
+    tags = indexes.MultiValueField()
+    author = indexes.CharField(model_attr='author__username')
+    created_at = indexes.DateTimeField(model_attr='created_at')
+    is_featured = indexes.BooleanField(model_attr='is_featured')
 
     def get_model(self):
         # 指定要索引的模型
         return Article
 
     def index_queryset(self, using=None):
-        # 返回要索引的对象集合（这里是所有已发布的文章）
-        return self.get_model().objects.all()
\ No newline at end of file
+        # 只索引已发布的文章；作者、分类、标签一起取出，逐篇准备文档时不再查询
+        return self.get_model().objects.filter(status='published').select_related(
+            'author', 'category'
+        ).prefetch_related('tags')
+
+    def prepare_tags(self, obj):
+        return [tag.name for tag in obj.tags.all()]
+
+    def update_object(self, instance, using=None, **kwargs):
+        # 信号只传入单个实例，不经过 index_queryset：取消发布的文章要从索引中移除
+        if instance.status != 'published':
+            self.remove_object(instance, using=using, **kwargs)
+            return
+        super().update_object(instance, using=using, **kwargs)
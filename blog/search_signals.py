@@ -0,0 +1,165 @@
+# blog/search_signals.py
+"""
+搜索索引的信号处理
+
+QueuedSignalProcessor 不在请求中写索引：保存和删除只往 SearchIndexOutbox 插入一行
+（与修改同一事务，回滚时一起撤销），由 ``python manage.py process_search_outbox`` 合并同一对象的
+多次修改后批量更新索引；只改动浏览量、点赞数、评论数的保存直接跳过。
+BulkAwareSignalProcessor 保留实时更新的方式，适合没有运行 worker 的开发环境。
+两者都跳过批量操作中的逐条信号，批量操作结束后由 update_search_index 处理整批文章。
+"""
+import logging
+from collections import defaultdict
+from contextlib import nullcontext
+
+from django.apps import apps
+from django.db import models, transaction
+from haystack import connections
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor, RealtimeSignalProcessor
+
+from .bulk import in_bulk_operation
+
+logger = logging.getLogger(__name__)
+
+
+class BulkAwareSignalProcessor(RealtimeSignalProcessor):
+    """批量操作期间不逐条更新索引"""
+
+    def handle_save(self, sender, instance, **kwargs):
+        if in_bulk_operation():
+            return
+        super().handle_save(sender, instance, **kwargs)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if in_bulk_operation():
+            return
+        super().handle_delete(sender, instance, **kwargs)
+
+
+def _is_indexed(model):
+    for using in connections.connections_info:
+        try:
+            connections[using].get_unified_index().get_index(model)
+            return True
+        except NotHandled:
+            continue
+    return False
+
+
+def enqueue_index_updates(model, pks):
+    """把需要重新索引的对象记入待更新表"""
+    from .models import SearchIndexOutbox
+
+    label = model._meta.label_lower
+    SearchIndexOutbox.objects.bulk_create([
+        SearchIndexOutbox(model=label, object_id=str(pk)) for pk in pks
+    ])
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """保存和删除只记入待更新表，由 worker 批量更新索引"""
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        from .models import COUNTER_FIELDS
+
+        if in_bulk_operation() or not _is_indexed(sender):
+            return
+        update_fields = kwargs.get('update_fields')
+        if update_fields and set(update_fields) <= COUNTER_FIELDS:
+            return
+        enqueue_index_updates(sender, [instance.pk])
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if in_bulk_operation() or not _is_indexed(sender):
+            return
+        enqueue_index_updates(sender, [instance.pk])
+
+
+def _sync_objects(model, pks):
+    """按数据库的当前状态更新索引：index_queryset 中有的更新，没有的（已删除、已取消发布）移除"""
+    label = model._meta.label_lower
+    for using in connections.connections_info:
+        try:
+            index = connections[using].get_unified_index().get_index(model)
+        except NotHandled:
+            continue
+        backend = connections[using].get_backend()
+        objects = list(index.index_queryset(using=using).filter(pk__in=pks))
+        found = {str(obj.pk) for obj in objects}
+        # 支持的后端把整批更新和删除合并为一次提交
+        batch = getattr(backend, 'batch', nullcontext)
+        with batch():
+            if objects:
+                backend.update(index, objects)
+            for pk in pks:
+                if str(pk) not in found:
+                    backend.remove(f'{label}.{pk}')
+
+
+def process_search_outbox(batch_size=500):
+    """处理一批待更新的对象，同一对象的多次修改只索引一次；返回更新的对象数"""
+    from .models import SearchIndexOutbox
+
+    rows = list(SearchIndexOutbox.objects.order_by('pk').values_list(
+        'pk', 'model', 'object_id'
+    )[:batch_size])
+    if not rows:
+        return 0
+
+    pending = defaultdict(set)
+    for _, label, object_id in rows:
+        pending[label].add(object_id)
+    for label, pks in pending.items():
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            continue
+        _sync_objects(model, sorted(pks))
+
+    # 只删除这一批读到的行，处理期间新加入的留到下一批
+    SearchIndexOutbox.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    return sum(len(pks) for pks in pending.values())
+
+
+def update_search_index(article_ids, action):
+    """批量更新（action='published'）或删除（action='deleted'）文章索引"""
+    from .models import Article
+
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+
+    if isinstance(apps.get_app_config('haystack').signal_processor, QueuedSignalProcessor):
+        # 由 worker 和逐条修改一起合并处理；articles_changed 在事务提交后发送，这里直接写入
+        enqueue_index_updates(Article, article_ids)
+        return
+
+    def apply():
+        for using in connections.connections_info:
+            backend = connections[using].get_backend()
+            try:
+                index = connections[using].get_unified_index().get_index(Article)
+            except NotHandled:
+                continue
+            try:
+                if action == 'deleted':
+                    for article_id in article_ids:
+                        backend.remove(f'blog.article.{article_id}')
+                else:
+                    backend.update(index, index.index_queryset(using=using).filter(
+                        pk__in=article_ids
+                    ))
+            except Exception:
+                # 索引失败不影响已提交的修改，可用 update_index 命令补建
+                logger.exception('批量更新搜索索引失败')
+
+    transaction.on_commit(apply)
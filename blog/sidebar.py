@@ -0,0 +1,186 @@
+# blog/sidebar.py
+"""
+首页侧边栏快照
+
+推荐文章、最新评论、分类统计、标签云和热门文章预先构建成一个带版本号的快照，
+首页只读缓存。数据变化时由信号只重建受影响的部件；
+快照过期后由拿到锁的一个请求重建，其余请求继续使用旧快照，避免缓存击穿。
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+SIDEBAR_KEY = 'blog:sidebar:snapshot'
+SIDEBAR_LOCK_KEY = 'blog:sidebar:lock'
+LOCK_TIMEOUT = 30
+POPULAR_COUNT = 5
+
+
+def build_featured_articles():
+    from .models import Article
+    return list(Article.objects.for_list().filter(
+        status='published',
+        is_featured=True
+    ).select_related('author').order_by('-created_at')[:3])
+
+
+def build_popular_articles():
+    from .models import Article
+    return list(Article.objects.for_list().filter(
+        status='published'
+    ).order_by('-view_count')[:POPULAR_COUNT])
+
+
+def build_recent_comments():
+    from comments.models import Comment
+    return list(Comment.objects.filter(
+        is_approved=True
+    ).select_related('author', 'article').only(
+        'id', 'content', 'created_at', 'guest_name',
+        'author__id', 'author__username',
+        'article__id', 'article__title', 'article__slug',
+    ).order_by('-created_at')[:5])
+
+
+def build_categories():
+    from .models import Category
+    return list(Category.objects.filter(
+        is_active=True,
+        published_article_count__gt=0
+    ).order_by('-published_article_count')[:10])
+
+
+def build_tags():
+    from .models import CustomTag
+    return list(CustomTag.objects.filter(
+        published_article_count__gt=0
+    ).order_by('-published_article_count')[:20])
+
+
+def build_published_count():
+    from .models import Article
+    return Article.objects.filter(status='published').count()
+
+
+WIDGETS = {
+    'featured_articles': build_featured_articles,
+    'popular_articles': build_popular_articles,
+    'recent_comments': build_recent_comments,
+    'categories': build_categories,
+    'tags': build_tags,
+    'published_count': build_published_count,
+}
+
+
+def article_widgets(article, old_status, old_category_id, deleted=False):
+    """
+    文章保存或删除后需要重建的部件
+
+    old_status / old_category_id 是保存前的状态和分类（新建时为 None）。发布状态变化影响
+    文章数、分类和标签统计；其余部件只在这篇文章正显示在其中、或按排序会进入其中时重建。
+    """
+    was_published = old_status == 'published'
+    is_published = article.status == 'published' and not deleted
+    names = set()
+    if was_published != is_published:
+        names |= {'published_count', 'categories', 'tags'}
+    elif is_published and old_category_id != article.category_id:
+        names.add('categories')
+
+    snapshot = cache.get(SIDEBAR_KEY)
+    if snapshot is None:
+        # 没有快照时下一个请求会完整构建
+        return names
+    widgets = snapshot['widgets']
+
+    def shown(name):
+        return any(obj.pk == article.pk for obj in widgets.get(name) or ())
+
+    if shown('featured_articles') or (is_published and article.is_featured):
+        names.add('featured_articles')
+    popular = widgets.get('popular_articles') or []
+    if shown('popular_articles') or is_published and (
+        len(popular) < POPULAR_COUNT or article.view_count >= popular[-1].view_count
+    ):
+        names.add('popular_articles')
+    # 最新评论中显示文章标题和链接
+    if any(comment.article_id == article.pk for comment in widgets.get('recent_comments') or ()):
+        names.add('recent_comments')
+    return names
+
+
+def _acquire_lock(wait=0):
+    deadline = time.monotonic() + wait
+    while True:
+        if cache.add(SIDEBAR_LOCK_KEY, 1, LOCK_TIMEOUT):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+
+def _release_lock():
+    cache.delete(SIDEBAR_LOCK_KEY)
+
+
+def _build(old, names):
+    widgets = dict(old['widgets']) if old else {}
+    for name in WIDGETS:
+        if name in names or name not in widgets:
+            widgets[name] = WIDGETS[name]()
+    return {
+        'version': (old['version'] if old else 0) + 1,
+        'built_at': timezone.now(),
+        'widgets': widgets,
+    }
+
+
+def rebuild_sidebar(names=None, wait=5):
+    """重建指定部件（默认全部），其余部件沿用旧快照"""
+    names = set(names or WIDGETS)
+    if not _acquire_lock(wait):
+        # 拿不到锁时删除快照，交给下一个请求完整重建，保证不会丢失这次变化
+        cache.delete(SIDEBAR_KEY)
+        return None
+    try:
+        snapshot = _build(cache.get(SIDEBAR_KEY), names)
+        cache.set(SIDEBAR_KEY, snapshot, None)
+        return snapshot
+    finally:
+        _release_lock()
+
+
+def get_sidebar_snapshot():
+    """读取侧边栏快照"""
+    snapshot = cache.get(SIDEBAR_KEY)
+    max_age = getattr(settings, 'BLOG_SIDEBAR_MAX_AGE', 60 * 60)
+
+    if snapshot is not None:
+        age = (timezone.now() - snapshot['built_at']).total_seconds()
+        # 过期后只有拿到锁的请求去刷新，其余请求直接返回旧快照
+        if age > max_age and _acquire_lock():
+            try:
+                snapshot = _build(snapshot, set(WIDGETS))
+                cache.set(SIDEBAR_KEY, snapshot, None)
+            finally:
+                _release_lock()
+        return snapshot
+
+    # 冷启动：一个请求构建，其余请求等待它完成
+    if _acquire_lock():
+        try:
+            snapshot = _build(None, set(WIDGETS))
+            cache.set(SIDEBAR_KEY, snapshot, None)
+            return snapshot
+        finally:
+            _release_lock()
+
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(SIDEBAR_KEY)
+        if snapshot is not None:
+            return snapshot
+    return _build(None, set(WIDGETS))
@@ -0,0 +1,263 @@
+# blog/signals.py
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from comments.models import Comment
+from .archive import adjust_archive_month
+from .article_cache import bump_article_version
+from .bulk import articles_changed, skip_in_bulk
+from .counters import adjust_category_counts, adjust_tag_counts, article_tag_ids
+from .images import needs_variants, schedule_variants
+from .local_cache import site_context_cache
+from .models import (
+    COUNTER_FIELDS, Article, ArticleBookmark, Category, CustomTag, SiteSettings, TaggedArticle
+)
+from .navigation import bump_adjacent_articles
+from .search_signals import update_search_index
+from .sidebar import WIDGETS, article_widgets, rebuild_sidebar
+from .suggest import record_suggest_changes
+from .user_stats import adjust_user_stat
+
+
+def refresh_sidebar(*names):
+    """事务提交后重建侧边栏中受影响的部件"""
+    transaction.on_commit(lambda: rebuild_sidebar(names))
+
+
+@receiver([post_save, post_delete], sender=Article)
+@skip_in_bulk
+def invalidate_article_body(sender, instance, **kwargs):
+    """文章修改或删除后使正文缓存失效"""
+    bump_article_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TaggedArticle)
+@skip_in_bulk
+def invalidate_article_body_on_tag(sender, instance, **kwargs):
+    """标签增减后使正文缓存失效"""
+    bump_article_version(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@skip_in_bulk
+def invalidate_article_body_on_comment(sender, instance, **kwargs):
+    """评论变化后使所属文章的正文缓存失效"""
+    bump_article_version(instance.article_id)
+
+
+@receiver([post_save, post_delete], sender=Article)
+@skip_in_bulk
+def refresh_sidebar_on_article(sender, instance, created=False, **kwargs):
+    """
+    文章变化后只重建受影响的侧边栏部件（只更新计数字段时跳过）
+
+    需要保存前的状态和分类，因此注册在 handle_status_change（会更新 _loaded_status）之前。
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    if created:
+        old_status = old_category_id = None
+    elif hasattr(instance, '_loaded_status'):
+        old_status = instance._loaded_status
+        old_category_id = getattr(instance, '_loaded_category_id', instance.category_id)
+    else:
+        # 不是从数据库读出的实例，无法判断变化
+        refresh_sidebar(*WIDGETS)
+        return
+    names = article_widgets(
+        instance, old_status, old_category_id, deleted=kwargs['signal'] is post_delete
+    )
+    if names:
+        refresh_sidebar(*names)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@skip_in_bulk
+def refresh_sidebar_on_comment(sender, instance, **kwargs):
+    """评论变化后重建最新评论"""
+    refresh_sidebar('recent_comments')
+
+
+@receiver([post_save, post_delete], sender=Category)
+@skip_in_bulk
+def refresh_sidebar_on_category(sender, instance, **kwargs):
+    """分类变化后重建分类统计"""
+    refresh_sidebar('categories')
+
+
+@receiver([post_save, post_delete], sender=CustomTag)
+@receiver(m2m_changed, sender=TaggedArticle)
+@skip_in_bulk
+def refresh_sidebar_on_tag(sender, instance, action=None, **kwargs):
+    """标签或文章的标签变化后重建标签云"""
+    if action and not action.startswith('post_'):
+        return
+    refresh_sidebar('tags')
+
+
+@receiver([post_save, post_delete], sender=SiteSettings)
+@receiver([post_save, post_delete], sender=Category)
+@skip_in_bulk
+def invalidate_site_context(sender, instance, **kwargs):
+    """站点设置或分类变化后使各 worker 的本地缓存失效"""
+    transaction.on_commit(site_context_cache.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Article)
+@skip_in_bulk
+def invalidate_site_context_on_article(sender, instance, **kwargs):
+    """文章增删或改分类会影响导航分类是否显示"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    transaction.on_commit(site_context_cache.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Article)
+@receiver([post_save, post_delete], sender=CustomTag)
+@receiver([post_save, post_delete], sender=Category)
+@skip_in_bulk
+def refresh_search_suggestions(sender, instance, **kwargs):
+    """文章标题、标签名、分类名变化后通知各 worker 更新搜索提示（只更新计数字段时跳过）"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    kind = {Article: 'article', CustomTag: 'tag', Category: 'category'}[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: record_suggest_changes(kind, [pk]))
+
+
+@receiver(post_save, sender=Article)
+@skip_in_bulk
+def handle_status_change(sender, instance, created, **kwargs):
+    """文章状态或分类变化时更新作者的草稿数、归档日历和分类 / 标签计数"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {'status', 'category'} & set(update_fields):
+        return
+
+    if created:
+        old_status = old_category_id = None
+    elif hasattr(instance, '_loaded_status'):
+        old_status = instance._loaded_status
+        old_category_id = getattr(instance, '_loaded_category_id', instance.category_id)
+    else:
+        # 不是从数据库读出的实例，无法判断原状态
+        return
+
+    was_published = old_status == 'published'
+    is_published = instance.status == 'published'
+    if (was_published, old_category_id) != (is_published, instance.category_id):
+        category_deltas = Counter()
+        if was_published:
+            category_deltas[old_category_id] -= 1
+        if is_published:
+            category_deltas[instance.category_id] += 1
+        adjust_category_counts(category_deltas)
+    if was_published != is_published:
+        sign = 1 if is_published else -1
+        adjust_tag_counts({tag_id: sign for tag_id in article_tag_ids([instance.pk])})
+    instance._loaded_category_id = instance.category_id
+
+    draft_delta = (instance.status == 'draft') - (old_status == 'draft')
+    adjust_user_stat(instance.author_id, 'draft_count', draft_delta)
+
+    published_delta = (instance.status == 'published') - (old_status == 'published')
+    adjust_archive_month(instance.created_at, published_delta)
+
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Article)
+@skip_in_bulk
+def invalidate_adjacent_bodies(sender, instance, **kwargs):
+    """已发布文章修改标题等信息后，使相邻文章的正文缓存失效"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    bump_adjacent_articles(instance)
+
+
+@receiver(pre_delete, sender=Article)
+@skip_in_bulk
+def release_tag_counts(sender, instance, **kwargs):
+    """删除已发布文章前减少其标签的计数（标签关联会被级联删除，不经过 m2m_changed）"""
+    if instance.status == 'published':
+        adjust_tag_counts({tag_id: -1 for tag_id in article_tag_ids([instance.pk])})
+
+
+@receiver(post_delete, sender=Article)
+@skip_in_bulk
+def handle_article_delete(sender, instance, **kwargs):
+    """删除文章时更新作者的草稿数、归档日历和分类计数，使相邻文章的正文缓存失效"""
+    if instance.status == 'draft':
+        adjust_user_stat(instance.author_id, 'draft_count', -1)
+    elif instance.status == 'published':
+        adjust_archive_month(instance.created_at, -1)
+        adjust_category_counts({instance.category_id: -1})
+        # 原来的前一篇和后一篇现在互为相邻
+        bump_adjacent_articles(instance)
+
+
+@receiver(m2m_changed, sender=TaggedArticle)
+@skip_in_bulk
+def update_tag_counts(sender, instance, action, pk_set, **kwargs):
+    """已发布文章增删标签时更新标签计数"""
+    if instance.status != 'published':
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = article_tag_ids([instance.pk])
+    elif action == 'post_clear':
+        adjust_tag_counts({tag_id: -1 for tag_id in getattr(instance, '_cleared_tag_ids', [])})
+    elif action in ('post_add', 'post_remove') and pk_set:
+        sign = 1 if action == 'post_add' else -1
+        adjust_tag_counts({tag_id: sign for tag_id in pk_set})
+
+
+@receiver(post_save, sender=ArticleBookmark)
+@skip_in_bulk
+def update_bookmark_count(sender, instance, created, **kwargs):
+    """新增收藏时更新用户的收藏数"""
+    if created:
+        adjust_user_stat(instance.user_id, 'bookmark_count', 1)
+
+
+@receiver(post_delete, sender=ArticleBookmark)
+@skip_in_bulk
+def update_bookmark_count_on_delete(sender, instance, **kwargs):
+    """取消收藏时更新用户的收藏数"""
+    adjust_user_stat(instance.user_id, 'bookmark_count', -1)
+
+
+def _schedule_image(field, update_fields):
+    if update_fields and field.field.name not in update_fields:
+        return
+    if field and needs_variants(field.name):
+        schedule_variants(field.name)
+
+
+@receiver(post_save, sender=Article)
+def generate_featured_image_variants(sender, instance, **kwargs):
+    """新的特色图片在请求之外生成缩略图"""
+    _schedule_image(instance.featured_image, kwargs.get('update_fields'))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def generate_profile_picture_variants(sender, instance, **kwargs):
+    """新的头像在请求之外生成缩略图"""
+    _schedule_image(instance.profile_picture, kwargs.get('update_fields'))
+
+
+@receiver(articles_changed)
+def handle_articles_changed(sender, article_ids, action, **kwargs):
+    """批量发布 / 删除后统一使缓存失效、重建侧边栏并更新搜索索引和搜索提示"""
+    for article_id in article_ids:
+        bump_article_version(article_id)
+    rebuild_sidebar()
+    site_context_cache.invalidate()
+    update_search_index(article_ids, action)
+    record_suggest_changes('article', article_ids)
@@ -0,0 +1,87 @@
+# blog/slugs.py
+"""
+文章 slug 分配
+
+同一基础 slug 的已有取值（base、base-1、base-2 ...）用一次前缀查询取出，
+在内存里选出最小的空闲序号；并发保存撞上唯一约束时由 Article.save 重新分配。
+批量导入用 assign_unique_slugs，一次为成千上万篇新文章分配 slug。
+"""
+from django.db.models import Q
+from django.utils.text import slugify
+
+SLUG_MAX_LENGTH = 200
+# 为 "-序号" 预留的长度
+SUFFIX_RESERVE = 8
+
+
+def base_slug(title):
+    """由标题生成基础 slug；中文标题等 slugify 后为空时使用 'article'"""
+    slug = slugify(title) if title else 'untitled-article'
+    if not slug or slug.startswith('-'):
+        slug = 'article'
+    return slug[:SLUG_MAX_LENGTH - SUFFIX_RESERVE].strip('-') or 'article'
+
+
+def needs_slug(slug):
+    return not slug or not slug.strip() or slug.startswith('-')
+
+
+def _taken_slugs(bases, exclude_pk=None):
+    """一次查询取出与这些基础 slug 冲突的全部已有 slug"""
+    from .models import Article
+
+    condition = Q()
+    for base in bases:
+        condition |= Q(slug=base) | Q(slug__startswith=f'{base}-')
+    queryset = Article.objects.filter(condition)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return set(queryset.values_list('slug', flat=True))
+
+
+def _free_slugs(base, taken):
+    """
+    依次产生空闲的 slug：先 base，再从小到大的空闲 base-N
+
+    每次产生前都重新检查 taken，调用方把分出去的 slug 加入 taken 后，
+    其他基础 slug（如 'a-1' 与 'a' 的第二个取值）不会再分到同一个。
+    """
+    if base not in taken:
+        yield base
+    counter = 1
+    while True:
+        slug = f'{base}-{counter}'
+        if slug not in taken:
+            yield slug
+        counter += 1
+
+
+def allocate_slug(title, exclude_pk=None):
+    """为一篇文章分配空闲的 slug（一次查询）"""
+    base = base_slug(title)
+    return next(_free_slugs(base, _taken_slugs([base], exclude_pk)))
+
+
+def assign_unique_slugs(articles, batch_size=500):
+    """
+    为一批未保存的文章分配互不冲突的 slug，供 bulk_create 导入前调用
+
+    每 batch_size 个不同的基础 slug 查询一次，同一批内的文章之间也不会冲突。
+    """
+    pending = [article for article in articles if needs_slug(article.slug)]
+    bases = {}
+    for article in pending:
+        bases.setdefault(base_slug(article.title), []).append(article)
+
+    names = list(bases)
+    taken = set()
+    for start in range(0, len(names), batch_size):
+        taken |= _taken_slugs(names[start:start + batch_size])
+    # 显式指定了 slug 的文章也要占位
+    taken |= {article.slug for article in articles if not needs_slug(article.slug)}
+
+    for base, group in bases.items():
+        for article, slug in zip(group, _free_slugs(base, taken)):
+            article.slug = slug
+            taken.add(slug)
+    return articles
@@ -0,0 +1,438 @@
+# blog/suggest.py
+"""
+搜索框的输入提示
+
+文章标题、标签名、分类名规范化（合并空白、忽略大小写）后放在排好序的数组里，前缀查询是两次
+二分查找，不访问数据库；标题里每个词的开头也各占一个键，输入中间的词同样能提示。
+匹配项很多的前缀（如单个字母）保存按权重排好的前几名：一两个字的前缀在构建时算好，
+更长的在第一次查询时计算；增删提示项时只修补受影响的前缀，不整体清空。
+
+每个 worker 在内存中保存一份：启动时从快照文件（build_suggest_snapshot 命令生成）载入，
+之后按共享缓存中的修改记录增量更新；修改记录缺失或积压过多时从数据库整体重建。
+
+排序权重（文章浏览量、标签 / 分类的已发布文章数）只在读取对应提示项时更新：修改记录只来自
+标题、名称、状态等字段的保存，浏览量写回和计数字段的增量不产生修改记录。权重因此停留在
+快照或上次整体重建时的值，加上之后被编辑过的提示项；需要定期运行 build_suggest_snapshot
+（worker 重启时载入）来刷新。
+"""
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+SUGGEST_SEQ_KEY = 'blog:suggest:seq'
+SUGGEST_CHANGE_KEY = 'blog:suggest:change:%s'
+# 修改记录的保留时间（秒）；worker 落后太多时直接重建
+CHANGE_TIMEOUT = 24 * 60 * 60
+MAX_PENDING_CHANGES = 1000
+# 匹配的键超过这个数时保存前几名的结果
+MAX_SCAN = 64
+# 每个前缀保存的结果数；修改后剩下不到 TOP_RESULTS 个（查询最多要这么多）时重新计算
+TOP_CANDIDATES = 40
+TOP_RESULTS = 20
+# 构建时预先计算的前缀长度
+PRECOMPUTE_LENGTH = 2
+
+URL_NAMES = {
+    'article': 'blog:article_detail',
+    'tag': 'blog:tag',
+    'category': 'blog:category',
+}
+# 每种类型只 reverse 一次，得到的地址模板中替换 slug（reverse 每次约几十微秒）
+URL_PLACEHOLDER = 'suggest-slug'
+
+
+def normalize(text):
+    return ' '.join(text.split()).casefold()
+
+
+def suggest_keys(label):
+    """label 的全部前缀查询键：完整名称和从每个词开始的后缀"""
+    words = normalize(label).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def load_entries(kind=None, pks=None):
+    """
+    从数据库读取提示项 {(类型, ID): (名称, slug, 权重)}，可只读取指定类型和ID
+
+    权重读取时的值会一直沿用到该项下次被读取，见模块说明。
+    """
+    from .models import Article, Category, CustomTag
+
+    querysets = {
+        'article': Article.objects.filter(status='published').values_list(
+            'pk', 'title', 'slug', 'view_count'
+        ),
+        'tag': CustomTag.objects.values_list('pk', 'name', 'slug', 'published_article_count'),
+        'category': Category.objects.filter(is_active=True).values_list(
+            'pk', 'name', 'slug', 'published_article_count'
+        ),
+    }
+    entries = {}
+    for name, queryset in querysets.items():
+        if kind is not None and name != kind:
+            continue
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        for pk, label, slug, weight in queryset.iterator():
+            entries[(name, pk)] = (label, slug, weight)
+    return entries
+
+
+class SuggestIndex:
+    """
+    按键排序的数组：keys[i] 是规范化后的键，refs[i] 是对应的 (类型, ID)
+
+    _top[前缀] = (按权重从高到低的前若干个 ref, 是否已包含全部匹配项)，保存的总是真正的前几名。
+    """
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        pairs = sorted(
+            (key, ref) for ref, (label, _, _) in self.entries.items() for key in suggest_keys(label)
+        )
+        self.keys = [key for key, _ in pairs]
+        self.refs = [ref for _, ref in pairs]
+        self._top = {}
+        self._url_templates = {}
+        self._precompute()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def copy(self):
+        # _top 中的值是元组，修补时整体替换，副本可以共用
+        index = SuggestIndex()
+        index.entries = dict(self.entries)
+        index.keys = list(self.keys)
+        index.refs = list(self.refs)
+        index._top = dict(self._top)
+        index._url_templates = dict(self._url_templates)
+        return index
+
+    def _rank(self, ref):
+        label, _, weight = self.entries[ref]
+        return weight, -len(label), ref
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        return lo, bisect.bisect_left(self.keys, prefix + '\U0010ffff', lo)
+
+    def _compute_top(self, lo, hi):
+        refs = set(self.refs[lo:hi])
+        return tuple(heapq.nlargest(TOP_CANDIDATES, refs, key=self._rank)), len(refs) <= TOP_CANDIDATES
+
+    def _precompute(self):
+        """算好所有匹配项很多的短前缀"""
+        for length in range(1, PRECOMPUTE_LENGTH + 1):
+            i = 0
+            while i < len(self.keys):
+                prefix = self.keys[i][:length]
+                if len(prefix) < length:
+                    i += 1
+                    continue
+                lo, hi = i, bisect.bisect_left(self.keys, prefix + '\U0010ffff', i)
+                if hi - lo > MAX_SCAN:
+                    self._top[prefix] = self._compute_top(lo, hi)
+                i = hi
+
+    def _affected(self, keys):
+        """_top 中是这些键的前缀的那些前缀"""
+        return {key[:i] for key in keys for i in range(1, len(key) + 1)} & self._top.keys()
+
+    def remove(self, ref):
+        entry = self.entries.pop(ref, None)
+        if entry is None:
+            return
+        keys = suggest_keys(entry[0])
+        for key in keys:
+            lo, hi = bisect.bisect_left(self.keys, key), bisect.bisect_right(self.keys, key)
+            for i in range(lo, hi):
+                if self.refs[i] == ref:
+                    del self.keys[i]
+                    del self.refs[i]
+                    break
+
+        for prefix in self._affected(keys):
+            ranked, complete = self._top[prefix]
+            if ref not in ranked:
+                continue
+            ranked = tuple(r for r in ranked if r != ref)
+            if complete or len(ranked) >= TOP_RESULTS:
+                self._top[prefix] = ranked, complete
+                continue
+            lo, hi = self._range(prefix)
+            if hi - lo > MAX_SCAN:
+                self._top[prefix] = self._compute_top(lo, hi)
+            else:
+                del self._top[prefix]
+
+    def upsert(self, ref, entry):
+        self.remove(ref)
+        self.entries[ref] = entry
+        keys = suggest_keys(entry[0])
+        for key in keys:
+            i = bisect.bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.refs.insert(i, ref)
+
+        rank = self._rank(ref)
+        for prefix in self._affected(keys):
+            ranked, complete = self._top[prefix]
+            # 保存的是前几名：新项排在最后一名之前才加入
+            if complete or rank > self._rank(ranked[-1]):
+                ranked = sorted(ranked + (ref,), key=self._rank, reverse=True)
+                if len(ranked) > TOP_CANDIDATES:
+                    ranked, complete = ranked[:TOP_CANDIDATES], False
+                self._top[prefix] = tuple(ranked), complete
+        # 新增的项可能让某个短前缀的匹配项超过 MAX_SCAN
+        for prefix in {key[:i] for key in keys for i in range(1, PRECOMPUTE_LENGTH + 1) if len(key) >= i}:
+            if prefix not in self._top:
+                lo, hi = self._range(prefix)
+                if hi - lo > MAX_SCAN:
+                    self._top[prefix] = self._compute_top(lo, hi)
+
+    def _ranked(self, prefix, limit):
+        top = self._top.get(prefix)
+        if top is None:
+            lo, hi = self._range(prefix)
+            if hi - lo <= MAX_SCAN:
+                return heapq.nlargest(limit, set(self.refs[lo:hi]), key=self._rank)
+            top = self._top[prefix] = self._compute_top(lo, hi)
+        ranked, complete = top
+        if complete or limit <= len(ranked):
+            return list(ranked[:limit])
+        lo, hi = self._range(prefix)
+        return heapq.nlargest(limit, set(self.refs[lo:hi]), key=self._rank)
+
+    def _url(self, kind, slug):
+        template = self._url_templates.get(kind)
+        if template is None:
+            template = self._url_templates[kind] = reverse(URL_NAMES[kind], kwargs={'slug': URL_PLACEHOLDER})
+        return template.replace(URL_PLACEHOLDER, slug)
+
+    def search(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        return [
+            {
+                'type': kind,
+                'text': self.entries[(kind, pk)][0],
+                'url': self._url(kind, self.entries[(kind, pk)][1]),
+            }
+            for kind, pk in self._ranked(prefix, limit)
+        ]
+
+
+def record_suggest_changes(kind, pks):
+    """记录需要更新的提示项，各 worker 下次查询时增量更新（应在事务提交后调用）"""
+    pks = list(pks)
+    if not pks:
+        return
+    try:
+        last = cache.incr(SUGGEST_SEQ_KEY, len(pks))
+    except ValueError:
+        cache.add(SUGGEST_SEQ_KEY, 0, None)
+        last = cache.incr(SUGGEST_SEQ_KEY, len(pks))
+    first = last - len(pks) + 1
+    cache.set_many(
+        {SUGGEST_CHANGE_KEY % seq: (kind, pk) for seq, pk in zip(range(first, last + 1), pks)},
+        CHANGE_TIMEOUT,
+    )
+
+
+def _snapshot_path():
+    return getattr(settings, 'BLOG_SUGGEST_SNAPSHOT', None)
+
+
+def write_snapshot(path=None):
+    """把数据库中的全部提示项写入快照文件，返回条数"""
+    path = path or _snapshot_path()
+    seq = cache.get(SUGGEST_SEQ_KEY) or 0
+    entries = load_entries()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'seq': seq,
+            'entries': [[kind, pk, *entry] for (kind, pk), entry in entries.items()],
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class SuggestStore:
+    """
+    每个 worker 一份的提示索引，按共享的修改序号增量更新
+
+    查询只读取当前索引的引用，不加锁；更新时在锁外构建新的 SuggestIndex（增量修改在副本上进行），
+    再在锁内替换。正在更新时其他请求继续使用旧索引，不会排队等待。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index = None
+        self._seq = None
+        self._checked_at = 0.0
+
+    def load_snapshot(self, path=None):
+        """从快照文件载入（不访问数据库和缓存），文件不存在时返回 False"""
+        path = path or _snapshot_path()
+        if not path or not os.path.exists(path):
+            return False
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        index = SuggestIndex({
+            (kind, pk): (label, slug, weight) for kind, pk, label, slug, weight in snapshot['entries']
+        })
+        with self._lock:
+            self._index, self._seq = index, snapshot['seq']
+            self._checked_at = 0.0
+        return True
+
+    def _changed_index(self, index, seq, current):
+        """在 index 的副本上应用 seq 之后的修改；修改记录已过期时从数据库重建"""
+        keys = [SUGGEST_CHANGE_KEY % n for n in range(seq + 1, current + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return SuggestIndex(load_entries())
+
+        pending = {}
+        for kind, pk in changes.values():
+            pending.setdefault(kind, set()).add(pk)
+        index = index.copy()
+        for kind, pks in pending.items():
+            entries = load_entries(kind, pks)
+            for pk in pks:
+                ref = (kind, pk)
+                if ref in entries:
+                    index.upsert(ref, entries[ref])
+                else:
+                    index.remove(ref)
+        return index
+
+    def _sync(self):
+        """必要时读取共享的修改序号，在锁外构建新索引后替换"""
+        interval = getattr(settings, 'BLOG_LOCAL_CACHE_CHECK_INTERVAL', 1.0)
+        if self._index is not None and time.monotonic() - self._checked_at < interval:
+            return
+        # 已有索引时不等待：其他线程正在更新就先用旧索引回答
+        if not self._refresh_lock.acquire(blocking=self._index is None):
+            return
+        try:
+            index, seq = self._index, self._seq
+            if index is not None and time.monotonic() - self._checked_at < interval:
+                return
+            self._checked_at = time.monotonic()
+
+            current = cache.get(SUGGEST_SEQ_KEY)
+            if current is None:
+                cache.add(SUGGEST_SEQ_KEY, 0, None)
+                current = cache.get(SUGGEST_SEQ_KEY) or 0
+
+            if index is None or current < seq or current - seq > MAX_PENDING_CHANGES:
+                # 首次使用且没有快照、缓存被清空或积压过多时整体重建
+                index = SuggestIndex(load_entries())
+            elif current > seq:
+                index = self._changed_index(index, seq, current)
+            else:
+                return
+
+            with self._lock:
+                self._index, self._seq = index, current
+        finally:
+            self._refresh_lock.release()
+
+    def search(self, prefix, limit=8):
+        self._sync()
+        return self._index.search(prefix, limit)
+
+
+suggest_store = SuggestStore()
+
+
+def benchmark(n_entries=100000, n_queries=2000, limit=8, seed=0):
+    """
+    用随机生成的标题比较内存前缀查询与数据库 LIKE 'x%' 查询，返回各自的耗时分位数（毫秒）
+
+    数据库一侧使用内存中的 SQLite 表并在标题上建索引，是对 LIKE 查询最有利的情况。
+    除随机前缀外另测单字前缀（输入框最常见的第一次请求）：内存一侧每次查询前先修改一个
+    提示项的权重，模拟有文章更新后的第一次查询。
+    """
+    import random
+    import sqlite3
+    import statistics
+
+    rng = random.Random(seed)
+    chars = [chr(0x4e00 + rng.randrange(3000)) for _ in range(800)]
+    words = [''.join(rng.choice(chars) for _ in range(rng.choice((2, 3)))) for _ in range(5000)]
+    words += ['django', 'python', 'redis', 'mysql', 'docker', 'nginx', 'celery', 'whoosh']
+    entries = {
+        ('article', pk): (' '.join(rng.choices(words, k=rng.randint(2, 5))), f'a-{pk}', rng.randrange(10000))
+        for pk in range(n_entries)
+    }
+    queries = []
+    for _ in range(n_queries):
+        label = entries[('article', rng.randrange(n_entries))][0]
+        queries.append(label[:rng.randint(1, min(len(label), 6))])
+    broad_queries = [
+        entries[('article', rng.randrange(n_entries))][0][0] if i % 2 else rng.choice('dprmnc')
+        for i in range(n_queries)
+    ]
+
+    def percentiles(timings):
+        timings.sort()
+        return {
+            'p50_ms': statistics.median(timings) * 1000,
+            'p99_ms': timings[int(len(timings) * 0.99) - 1] * 1000,
+        }
+
+    report = {}
+    start = time.perf_counter()
+    index = SuggestIndex(entries)
+    report['build_s'] = time.perf_counter() - start
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit)
+        timings.append(time.perf_counter() - start)
+    report['memory'] = percentiles(timings)
+
+    timings = []
+    for query in broad_queries:
+        ref = ('article', rng.randrange(n_entries))
+        label, slug, _ = index.entries[ref]
+        index.upsert(ref, (label, slug, rng.randrange(10000)))
+        start = time.perf_counter()
+        index.search(query, limit)
+        timings.append(time.perf_counter() - start)
+    report['memory_broad'] = percentiles(timings)
+
+    db = sqlite3.connect(':memory:')
+    db.execute('PRAGMA case_sensitive_like = ON')
+    db.execute('CREATE TABLE article (id INTEGER PRIMARY KEY, title TEXT, view_count INTEGER)')
+    db.execute('CREATE INDEX article_title ON article (title)')
+    db.executemany(
+        'INSERT INTO article VALUES (?, ?, ?)',
+        ((pk, label, weight) for (_, pk), (label, _, weight) in entries.items()),
+    )
+    for name, batch in (('like', queries), ('like_broad', broad_queries)):
+        timings = []
+        for query in batch:
+            start = time.perf_counter()
+            db.execute(
+                'SELECT id, title FROM article WHERE title LIKE ? ORDER BY view_count DESC LIMIT ?',
+                (query.replace('%', '') + '%', limit),
+            ).fetchall()
+            timings.append(time.perf_counter() - start)
+        report[name] = percentiles(timings)
+    return report
@@ -0,0 +1,39 @@
+# blog/templatetags/blog_images.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from blog.images import get_variants
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, url in variants)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    输出带 srcset / sizes 的懒加载图片
+
+    用法：{% responsive_image article.featured_image alt=article.title sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" %}
+    还没有缩略图时退回原图。
+    """
+    if not image:
+        return ''
+    attrs = {'loading': 'lazy', 'decoding': 'async', **attrs}
+    variants = get_variants(image.name)
+    if not variants:
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, flatatt(attrs))
+
+    sources = format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">',
+        _srcset(variants['webp']), sizes
+    ) if 'webp' in variants else ''
+    if 'jpeg' in variants:
+        attrs.update(srcset=_srcset(variants['jpeg']), sizes=sizes)
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}"{}></picture>',
+        sources, image.url, alt, flatatt(attrs)
+    )
@@ -1,3 +1,410 @@
-from django.test import TestCase
+import heapq
+import random
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import reactions, suggest, view_counter
+from .models import Article, ArticleBookmark, ArticleLike, Category, CustomTag
+from .pagination import CursorPaginator, InvalidCursor, normalize_ordering
+from .sidebar import get_sidebar_snapshot
+from .slugs import allocate_slug, assign_unique_slugs
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def make_user(username='author'):
+    return get_user_model().objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass'
+    )
+
+
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user()
+        for i in range(5):
+            Article.objects.create(title=f'Page {i}', content='x', author=user)
+
+    def test_pages_walk_every_row_once(self):
+        queryset = Article.objects.all()
+        paginator = CursorPaginator(queryset, 2)
+        expected = list(queryset.order_by('-created_at', '-id').values_list('pk', flat=True))
+        seen, page = [], paginator.page()
+        while True:
+            seen += [article.pk for article in page]
+            if not page.has_next():
+                break
+            page = paginator.page(after=page.next_cursor)
+        self.assertEqual(seen, expected)
+        self.assertEqual(page.number, 3)
+
+        previous = paginator.page(before=page.previous_cursor)
+        self.assertEqual([article.pk for article in previous], expected[2:4])
+
+    def test_rejects_tampered_or_foreign_cursor(self):
+        paginator = CursorPaginator(Article.objects.all(), 2)
+        cursor = paginator.page().next_cursor
+        for token in (cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'), 'garbage'):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(after=token)
+        # 换了排序的游标不能继续使用
+        with self.assertRaises(InvalidCursor):
+            CursorPaginator(Article.objects.order_by('title'), 2).page(after=cursor)
+
+    def test_nullable_and_relation_orderings_are_not_supported(self):
+        for ordering in ('-published_at', 'category'):
+            with self.subTest(ordering=ordering):
+                self.assertIsNone(normalize_ordering(Article.objects.order_by(ordering)))
+        self.assertEqual(normalize_ordering(Article.objects.order_by('title')), [('title', False), ('id', False)])
+
+
+class SlugAllocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def article(self, title, **kwargs):
+        return Article(title=title, content='<p>正文</p>', author=self.user, **kwargs)
+
+    def test_allocate_picks_smallest_free_suffix(self):
+        for slug in ('hello', 'hello-1', 'hello-3'):
+            Article.objects.create(title='x', slug=slug, content='x', author=self.user)
+        self.assertEqual(allocate_slug('Hello'), 'hello-2')
+
+    def test_allocate_ignores_excluded_article(self):
+        article = Article.objects.create(title='Hello', content='x', author=self.user)
+        self.assertEqual(article.slug, 'hello')
+        self.assertEqual(allocate_slug('Hello', exclude_pk=article.pk), 'hello')
+
+    def test_untitled_and_cjk_titles_fall_back(self):
+        self.assertEqual(allocate_slug('中文标题'), 'article')
+
+    def test_batch_slugs_never_collide_across_bases(self):
+        # 'A 1' 的基础 slug 'a-1' 与 'A' 的第二个取值相同
+        articles = assign_unique_slugs([self.article(title) for title in ('A', 'A', 'A 1')])
+        slugs = [article.slug for article in articles]
+        self.assertEqual(len(set(slugs)), 3)
+        Article.objects.bulk_create(articles)
+
+    def test_batch_respects_existing_and_explicit_slugs(self):
+        Article.objects.create(title='x', slug='post', content='x', author=self.user)
+        articles = assign_unique_slugs([
+            self.article('Post'), self.article('Other', slug='post-1'), self.article('Post'),
+        ])
+        self.assertEqual([article.slug for article in articles], ['post-2', 'post-1', 'post-3'])
+
+
+class ViewCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(title='Views', content='x', author=make_user())
+
+    def view_count(self):
+        self.article.refresh_from_db(fields=['view_count'])
+        return self.article.view_count
+
+    def test_local_counter_flushes_pending_views(self):
+        counter = view_counter.LocalViewCounter(flush_interval=3600)
+        for _ in range(3):
+            counter.incr(self.article.pk)
+        self.assertEqual(counter.pending([self.article.pk]), {self.article.pk: 3})
+        self.assertEqual(counter.flush(), 1)
+        self.assertEqual(self.view_count(), 3)
+        self.assertEqual(counter.flush(), 0)
+
+    def test_same_batch_is_applied_once(self):
+        deltas = {str(self.article.pk): 4}
+        self.assertEqual(view_counter.apply_view_deltas(deltas, batch='b1'), 1)
+        self.assertEqual(view_counter.apply_view_deltas(deltas, batch='b1'), 0)
+        self.assertEqual(self.view_count(), 4)
+
+    @skipUnless(fakeredis, '需要 fakeredis')
+    def test_redis_flush_after_crash_does_not_double_count(self):
+        client = fakeredis.FakeRedis()
+        counter = view_counter.RedisViewCounter()
+        with mock.patch.object(view_counter.RedisViewCounter, 'client', client):
+            for _ in range(5):
+                counter.incr(self.article.pk)
+            # 模拟写回进程在写入数据库之后、删除批次之前中断
+            key = view_counter.FLUSHING_KEY % 'crashed'
+            client.eval(view_counter.CLAIM_SCRIPT, 3, view_counter.PENDING_KEY, key, view_counter.BATCHES_KEY)
+            view_counter.apply_view_deltas({str(self.article.pk): 5}, batch='crashed')
+            counter.incr(self.article.pk)
+            self.assertEqual(counter.pending([self.article.pk]), {self.article.pk: 6})
+
+            self.assertEqual(counter.flush(), 1)
+            self.assertEqual(counter.flush(), 0)
+            self.assertEqual(counter.pending([self.article.pk]), {self.article.pk: 0})
+        self.assertEqual(self.view_count(), 6)
+
+
+class ReactionFlushTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [make_user(f'reader{i}') for i in range(3)]
+        cls.article = Article.objects.create(title='Liked', content='x', author=cls.users[0])
+
+    def like_count(self):
+        self.article.refresh_from_db(fields=['like_count'])
+        return self.article.like_count
+
+    def test_applying_same_changes_twice_is_safe(self):
+        a, b, c = (user.pk for user in self.users)
+        pk = self.article.pk
+        changes = {('likes', pk, a): True, ('likes', pk, b): True, ('bookmarks', pk, c): True}
+        self.assertEqual(reactions.apply_reactions(changes), 1)
+        self.assertEqual(reactions.apply_reactions(changes), 1)
+        self.assertEqual(ArticleLike.objects.filter(article=self.article).count(), 2)
+        self.assertEqual(ArticleBookmark.objects.filter(article=self.article).count(), 1)
+        self.assertEqual(self.like_count(), 2)
+
+        changes = {('likes', pk, a): False, ('likes', pk, c): False}
+        reactions.apply_reactions(changes)
+        reactions.apply_reactions(changes)
+        self.assertEqual(self.like_count(), 1)
+
+    @skipUnless(fakeredis, '需要 fakeredis')
+    def test_redis_toggles_are_flushed_in_one_batch(self):
+        ArticleLike.objects.create(article=self.article, user=self.users[0])
+        store = reactions.RedisReactionStore()
+        with mock.patch.object(reactions.RedisReactionStore, 'client', fakeredis.FakeRedis()):
+            self.assertEqual(store.toggle('likes', self.article.pk, self.users[1].pk), (True, 2))
+            self.assertEqual(store.toggle('likes', self.article.pk, self.users[0].pk), (False, 1))
+            self.assertEqual(store.state(self.article.pk, self.users[1].pk)['liked'], True)
+            self.assertEqual(store.flush(), 1)
+            self.assertEqual(store.flush(), 0)
+        self.assertEqual(
+            list(ArticleLike.objects.filter(article=self.article).values_list('user', flat=True)),
+            [self.users[1].pk],
+        )
+        self.assertEqual(self.like_count(), 1)
+
+
+class ContentAnalysisTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def test_save_keeps_content_and_renders_heading_anchors(self):
+        content = '<h2>第一节</h2><p>正文 body</p><h3 id="keep">第二节</h3>'
+        article = Article.objects.create(title='Toc', content=content, author=self.user)
+        article.refresh_from_db()
+        self.assertEqual(article.content, content)
+        self.assertEqual([item['anchor'] for item in article.toc], ['toc-1', 'keep'])
+        self.assertIn('<h2 id="toc-1">', article.rendered_content)
+        self.assertEqual(article.word_count, 9)
+
+    def test_pages_show_generated_summary_without_excerpt(self):
+        article = Article.objects.create(
+            title='Summary', content='<p>自动生成的摘要</p>', author=self.user, status='published',
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('blog:article_delete', kwargs={'slug': article.slug}))
+        self.assertContains(response, '自动生成的摘要')
+
+
+class PublishedCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def test_counts_follow_publish_and_unpublish(self):
+        category = Category.objects.create(name='Counted', slug='counted')
+        article = Article.objects.create(title='C', content='x', author=self.user, category=category)
+        article.tags.set(['counted'])
+        tag = CustomTag.objects.get(name='counted')
+        self.assertEqual(Category.objects.get(pk=category.pk).published_article_count, 0)
+
+        article.status = 'published'
+        article.save()
+        self.assertEqual(Category.objects.get(pk=category.pk).published_article_count, 1)
+        self.assertEqual(CustomTag.objects.get(pk=tag.pk).published_article_count, 1)
+
+        article.status = 'draft'
+        article.save()
+        self.assertEqual(Category.objects.get(pk=category.pk).published_article_count, 0)
+        self.assertEqual(CustomTag.objects.get(pk=tag.pk).published_article_count, 0)
+
+    def test_editing_category_or_tag_keeps_count(self):
+        category = Category.objects.create(name='Edited', slug='edited')
+        tag = CustomTag.objects.create(name='edited', slug='edited')
+        # 先读出分类和标签，再发布文章（如后台编辑页打开期间有文章发布）
+        category = Category.objects.get(pk=category.pk)
+        tag = CustomTag.objects.get(pk=tag.pk)
+        article = Article.objects.create(
+            title='E', content='x', author=self.user, category=category, status='published',
+        )
+        article.tags.add(tag)
+
+        category.description = '修改描述'
+        category.save()
+        tag.description = '修改描述'
+        tag.save()
+        category.refresh_from_db()
+        tag.refresh_from_db()
+        self.assertEqual(category.description, '修改描述')
+        self.assertEqual(category.published_article_count, 1)
+        self.assertEqual(tag.published_article_count, 1)
+
+
+class CategoryPathTests(TestCase):
+
+    def category(self, name, parent=None):
+        return Category.objects.create(name=name, slug=f'tree-{name.lower()}', parent=parent)
+
+    def test_moving_a_category_moves_its_subtree(self):
+        root, other = self.category('Root'), self.category('Other')
+        child = self.category('Child', root)
+        leaf = self.category('Leaf', child)
+        self.assertEqual(leaf.path, f'{root.pk}/{child.pk}/{leaf.pk}/')
+        self.assertEqual(leaf.depth, 2)
+
+        child.parent = other
+        child.save()
+        leaf.refresh_from_db()
+        self.assertEqual(leaf.path, f'{other.pk}/{child.pk}/{leaf.pk}/')
+        self.assertEqual(list(root.get_descendants(include_self=False)), [])
+        self.assertEqual(set(other.get_descendants()), {other, child, leaf})
+        self.assertEqual(leaf.get_ancestors(), [other, child])
+
+    def test_cannot_move_under_own_descendant(self):
+        root = self.category('Root')
+        leaf = self.category('Leaf', self.category('Child', root))
+        root.parent = leaf
+        with self.assertRaises(ValidationError):
+            root.clean()
+        with self.assertRaises(ValueError):
+            root.save()
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+
+
+class SuggestIndexTests(TestCase):
+
+    def brute_force(self, index, prefix, limit):
+        refs = {ref for key, ref in zip(index.keys, index.refs) if key.startswith(prefix)}
+        return heapq.nlargest(limit, refs, key=index._rank)
+
+    @mock.patch.object(suggest, 'MAX_SCAN', 8)
+    @mock.patch.object(suggest, 'TOP_CANDIDATES', 6)
+    @mock.patch.object(suggest, 'TOP_RESULTS', 3)
+    def test_patched_top_results_match_full_scan(self):
+        rng = random.Random(0)
+        words = ['apple', 'art', 'ant', 'banana', 'band', '数据', '数据库', 'zoo']
+
+        def entry():
+            return ' '.join(rng.choices(words, k=rng.randint(1, 3))), 'slug', rng.randrange(20)
+
+        index = suggest.SuggestIndex({('article', pk): entry() for pk in range(200)})
+        self.assertIn('a', index._top)
+        for step in range(300):
+            if step % 50 == 0:
+                index = index.copy()
+            ref = ('article', rng.randrange(220))
+            if rng.random() < 0.3:
+                index.remove(ref)
+            else:
+                index.upsert(ref, entry())
+            for prefix in ('a', 'an', 'b', '数', '数据', 'apple a', 'x'):
+                for limit in (1, 3, 8):
+                    self.assertEqual(index._ranked(prefix, limit), self.brute_force(index, prefix, limit))
+
+    def test_search_matches_word_starts_case_insensitively(self):
+        index = suggest.SuggestIndex({
+            ('article', 1): ('Django ORM Tips', 'django-orm', 5),
+            ('tag', 2): ('orm', 'orm', 9),
+        })
+        self.assertEqual([item['text'] for item in index.search(' ORM')], ['orm', 'Django ORM Tips'])
+        self.assertEqual(index.search('   '), [])
+
+
+@override_settings(BLOG_LOCAL_CACHE_CHECK_INTERVAL=0)
+class SuggestStoreTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_store_picks_up_changes_incrementally(self):
+        user = make_user()
+        store = suggest.SuggestStore()
+        self.assertEqual(store.search('quokka'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(
+                title='Quokka facts', content='x', author=user, status='published',
+            )
+        with mock.patch.object(suggest, 'load_entries', wraps=suggest.load_entries) as load:
+            self.assertEqual([item['text'] for item in store.search('quokka')], ['Quokka facts'])
+        # 只按修改记录读取这一篇，不整体重建
+        load.assert_called_once_with('article', {article.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.status = 'draft'
+            article.save()
+        self.assertEqual(store.search('quokka'), [])
+
+
+class SidebarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.popular = Article.objects.create(
+            title='Popular', content='x', author=cls.user, status='published', view_count=100,
+        )
+        cls.draft = Article.objects.create(title='Draft', content='x', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.snapshot = get_sidebar_snapshot()
+
+    def save(self, article):
+        with mock.patch('blog.signals.rebuild_sidebar') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                article.save()
+        return set().union(*(set(call.args[0]) for call in rebuild.call_args_list))
+
+    def test_editing_a_draft_rebuilds_nothing(self):
+        draft = Article.objects.get(pk=self.draft.pk)
+        draft.title = 'Draft 2'
+        self.assertEqual(self.save(draft), set())
+
+    def test_publishing_rebuilds_counts_and_unfilled_popular_list(self):
+        draft = Article.objects.get(pk=self.draft.pk)
+        draft.status = 'published'
+        self.assertEqual(self.save(draft), {'published_count', 'categories', 'tags', 'popular_articles'})
+
+    def test_editing_a_shown_article_rebuilds_its_widget(self):
+        popular = Article.objects.get(pk=self.popular.pk)
+        popular.title = 'Popular 2'
+        self.assertEqual(self.save(popular), {'popular_articles'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            popular.save()
+        titles = [article.title for article in get_sidebar_snapshot()['widgets']['popular_articles']]
+        self.assertIn('Popular 2', titles)
+
+
+class RelatedTokenizeTests(TestCase):
+
+    def test_cjk_tokens_match_search_analyzer(self):
+        from .related import tokenize
+        from .search_analysis import CJKBigramAnalyzer
+
+        text = '数据库优化 한국어 カタカナ'
+        searched = [token.text for token in CJKBigramAnalyzer()(text)]
+        self.assertEqual(tokenize(text), searched)
@@ -17,6 +17,7 @@ urlpatterns = [
     # 互动功能
     path('article/<int:pk>/like/', views.LikeArticleView.as_view(), name='article_like'),
     path('article/<int:pk>/bookmark/', views.BookmarkArticleView.as_view(), name='article_bookmark'),
+    path('article/<int:pk>/state/', views.ArticleViewerStateView.as_view(), name='article_state'),
 
     # 分类和标签
     path('tag/<slug:slug>/', views.TagView.as_view(), name='tag'),
@@ -0,0 +1,82 @@
+# blog/user_stats.py
+"""
+用户计数（草稿数、收藏数）
+
+计数保存在共享缓存中，通过原子的 incr 增减，模板上下文只需一次缓存读取；
+缓存中不存在时从数据库统计并回填，计数漂移可用 reconcile_user_stats 命令修复。
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+USER_STAT_KEY = 'blog:user:%s:%s'
+
+
+def count_drafts(user_ids):
+    from .models import Article
+    return dict(Article.objects.filter(
+        author_id__in=user_ids,
+        status='draft'
+    ).values('author_id').annotate(n=Count('id')).values_list('author_id', 'n'))
+
+
+def count_bookmarks(user_ids):
+    from .models import ArticleBookmark
+    return dict(ArticleBookmark.objects.filter(
+        user_id__in=user_ids
+    ).values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+
+
+# 计数名称 -> 按用户批量统计的函数
+USER_STATS = {
+    'draft_count': count_drafts,
+    'bookmark_count': count_bookmarks,
+}
+
+
+def get_user_stats(user_id):
+    """读取用户的全部计数，缺失的从数据库统计后回填"""
+    keys = {name: USER_STAT_KEY % (user_id, name) for name in USER_STATS}
+    cached = cache.get_many(keys.values())
+
+    stats = {}
+    for name, key in keys.items():
+        if key in cached:
+            stats[name] = max(0, cached[key])
+        else:
+            stats[name] = USER_STATS[name]([user_id]).get(user_id, 0)
+            cache.add(key, stats[name], None)
+    return stats
+
+
+def adjust_user_stat(user_id, name, delta):
+    """事务提交后原子地增减计数；缓存中没有时跳过，下次读取会重新统计"""
+    if not user_id or not delta:
+        return
+
+    def apply():
+        try:
+            cache.incr(USER_STAT_KEY % (user_id, name), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+def reconcile_user_stats(user_ids):
+    """用数据库中的真实数量覆盖缓存，返回被修正的计数个数"""
+    user_ids = list(user_ids)
+    fixed = 0
+    for name, counter in USER_STATS.items():
+        actual = counter(user_ids)
+        keys = {user_id: USER_STAT_KEY % (user_id, name) for user_id in user_ids}
+        cached = cache.get_many(keys.values())
+        updates = {}
+        for user_id, key in keys.items():
+            value = actual.get(user_id, 0)
+            if cached.get(key) != value:
+                updates[key] = value
+        if updates:
+            cache.set_many(updates, None)
+            fixed += len(updates)
+    return fixed
@@ -0,0 +1,229 @@
+# blog/view_counter.py
+"""
+文章浏览量写回缓冲
+
+详情页只在 Redis（或本进程内存）里累加浏览量增量，
+由 ``python manage.py flush_view_counts`` 定期批量写回数据库，
+热门文章的读取不再对数据库做任何写操作。
+
+Redis 中的写回：待写回哈希原子地改名为带随机批次号的键（同时只有一个写回进程能拿到），
+批次号和增量在同一个数据库事务中写入，重复写回同一批（多个写回进程、写回后进程中断）
+会因批次号唯一而跳过，浏览量不会重复计数。
+"""
+import hashlib
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+from django.utils import timezone
+
+PENDING_KEY = 'blog:views:pending'
+FLUSHING_KEY = 'blog:views:flushing:%s'
+# 已取走、尚未确认写回的批次
+BATCHES_KEY = 'blog:views:batches'
+UNIQUE_KEY = 'blog:views:uv:%s'
+# 已写回批次号的保留时间；遗留批次在这段时间内重复写回都会被识别
+BATCH_RETENTION = timedelta(days=7)
+
+# 把待写回哈希改名为批次键并登记，没有待写回的增量时返回 0
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('SADD', KEYS[3], KEYS[2])
+return 1
+"""
+
+# 待写回哈希和全部未确认批次中这些文章的增量之和
+PENDING_SCRIPT = """
+local totals = {}
+for i = 1, #ARGV do
+    totals[i] = tonumber(redis.call('HGET', KEYS[1], ARGV[i]) or 0)
+end
+for _, key in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    local values = redis.call('HMGET', key, unpack(ARGV))
+    for i = 1, #ARGV do
+        totals[i] = totals[i] + tonumber(values[i] or 0)
+    end
+end
+return totals
+"""
+
+
+def apply_view_deltas(deltas, batch=None):
+    """
+    把 {文章ID: 增量} 用一条 UPDATE ... CASE 语句写回数据库
+
+    指定 batch 时批次号与增量在同一事务中记录，同一批次已写回过则跳过并返回 0。
+    """
+    from .models import Article, ViewCountBatch
+
+    deltas = {int(pk): int(delta) for pk, delta in deltas.items() if int(delta)}
+    if not deltas:
+        return 0
+
+    whens = [
+        When(pk=pk, then=F('view_count') + delta)
+        for pk, delta in deltas.items()
+    ]
+    with transaction.atomic():
+        if batch is not None:
+            try:
+                with transaction.atomic():
+                    ViewCountBatch.objects.create(batch=batch)
+            except IntegrityError:
+                return 0
+        Article.objects.filter(pk__in=deltas.keys()).update(
+            view_count=Case(
+                *whens,
+                default=F('view_count'),
+                output_field=PositiveIntegerField(),
+            )
+        )
+    return len(deltas)
+
+
+def visitor_key(request):
+    """访客标识：登录用户用ID，游客用会话或 IP+UA 的摘要"""
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    if request.session.session_key:
+        return f's:{request.session.session_key}'
+    raw = '%s|%s' % (
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+    return 'a:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class RedisViewCounter:
+    """用 Redis 哈希缓冲增量，HyperLogLog 统计独立访客"""
+
+    def __init__(self, unique=False):
+        self.unique = unique
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def incr(self, article_id, visitor=None):
+        pipe = self.client.pipeline()
+        pipe.hincrby(PENDING_KEY, article_id, 1)
+        if self.unique and visitor:
+            pipe.pfadd(UNIQUE_KEY % article_id, visitor)
+        pipe.execute()
+
+    def pending(self, article_ids):
+        """尚未写回数据库的增量（含正在写回的批次）"""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return {}
+        totals = self.client.eval(PENDING_SCRIPT, 2, PENDING_KEY, BATCHES_KEY, *article_ids)
+        return dict(zip(article_ids, totals))
+
+    def unique_visitors(self, article_id):
+        if not self.unique:
+            return None
+        return self.client.pfcount(UNIQUE_KEY % article_id)
+
+    def flush(self):
+        client = self.client
+        client.eval(CLAIM_SCRIPT, 3, PENDING_KEY, FLUSHING_KEY % uuid.uuid4().hex, BATCHES_KEY)
+
+        # 连同之前中断的写回遗留下的批次一起处理；已写回的批次由 apply_view_deltas 跳过
+        flushed = 0
+        for key in client.smembers(BATCHES_KEY):
+            key = key.decode()
+            deltas = client.hgetall(key)
+            flushed += apply_view_deltas(
+                {k.decode(): v for k, v in deltas.items()},
+                batch=key.rsplit(':', 1)[1],
+            )
+            pipe = client.pipeline()
+            pipe.delete(key)
+            pipe.srem(BATCHES_KEY, key)
+            pipe.execute()
+
+        from .models import ViewCountBatch
+        ViewCountBatch.objects.filter(created_at__lt=timezone.now() - BATCH_RETENTION).delete()
+        return flushed
+
+
+class LocalViewCounter:
+    """
+    进程内的替代实现，用于没有 Redis 的开发环境
+
+    增量只在当前进程可见，因此由 incr 按间隔自行写回。
+    """
+
+    def __init__(self, unique=False, flush_interval=60):
+        self.unique = unique
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._visitors = {}
+        self._last_flush = time.monotonic()
+
+    def incr(self, article_id, visitor=None):
+        with self._lock:
+            self._pending[article_id] = self._pending.get(article_id, 0) + 1
+            if self.unique and visitor:
+                self._visitors.setdefault(article_id, set()).add(visitor)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def pending(self, article_ids):
+        with self._lock:
+            return {pk: self._pending.get(pk, 0) for pk in article_ids}
+
+    def unique_visitors(self, article_id):
+        if not self.unique:
+            return None
+        with self._lock:
+            return len(self._visitors.get(article_id, ()))
+
+    def flush(self):
+        with self._lock:
+            deltas, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        return apply_view_deltas(deltas)
+
+
+_counter = None
+
+
+def get_view_counter():
+    """按配置返回浏览量计数器（进程内单例）"""
+    global _counter
+    if _counter is None:
+        backend = getattr(settings, 'BLOG_VIEW_COUNTER_BACKEND', None)
+        if backend is None:
+            cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            backend = 'redis' if 'django_redis' in cache_backend else 'local'
+        unique = getattr(settings, 'BLOG_VIEW_COUNTER_UNIQUE', False)
+        if backend == 'redis':
+            _counter = RedisViewCounter(unique=unique)
+        else:
+            _counter = LocalViewCounter(
+                unique=unique,
+                flush_interval=getattr(settings, 'BLOG_VIEW_COUNTER_FLUSH_INTERVAL', 60),
+            )
+    return _counter
+
+
+def merge_pending_views(articles):
+    """把缓冲中的增量合并到文章对象的 view_count 上"""
+    articles = list(articles)
+    if not articles:
+        return articles
+    pending = get_view_counter().pending([a.pk for a in articles])
+    for article in articles:
+        article.view_count += pending.get(article.pk, 0)
+    return articles
@@ -10,18 +10,28 @@ from django.views.generic import (
 )
 from django.views import View
 from django.urls import reverse_lazy
-from django.http import JsonResponse, HttpResponseForbidden
-from django.db.models import Q, Count, F
+from django.http import Http404, JsonResponse, HttpResponseForbidden
+from django.db.models import Q, Count
 from django.core.paginator import Paginator
-from django.core.cache import cache
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
-from .models import Article, Category, ArticleLike, ArticleBookmark
+from django.views.decorators.cache import never_cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .models import Article, Category, CustomTag, ArticleBookmark, ArchiveMonth
 from .forms import ArticleForm, ArticleFilterForm
-
-
-class HomeView(ListView):
+from .archive import filter_archive
+from .categories import get_breadcrumbs, get_subcategories, subtree_filter
+from .article_cache import get_article_body
+from .bulk import delete_articles, publish_drafts, remove_bookmarks
+from .navigation import get_adjacent_articles
+from .pagination import CursorPaginationMixin
+from .reactions import get_reaction_store
+from .rendering import get_rendered_content
+from .sidebar import get_sidebar_snapshot
+from .view_counter import get_view_counter, merge_pending_views, visitor_key
+
+
+class HomeView(CursorPaginationMixin, ListView):
     """首页视图"""
     model = Article
     template_name = 'blog/home.html'
@@ -29,12 +39,12 @@ class HomeView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = Article.objects.filter(
+        queryset = Article.objects.for_list().filter(
             status='published'
         ).select_related('author', 'category').prefetch_related('tags')
 
-        # 应用筛选
-        form = ArticleFilterForm(self.request.GET)
+        # 应用筛选（表单在上下文中复用，避免重复构建）
+        form = self.filter_form = ArticleFilterForm(self.request.GET)
         if form.is_valid():
             category = form.cleaned_data.get('category')
             tag = form.cleaned_data.get('tag')
@@ -46,10 +56,7 @@ class HomeView(ListView):
                 queryset = queryset.filter(category=category)
             if tag:
                 queryset = queryset.filter(tags__name__icontains=tag)
-            if year:
-                queryset = queryset.filter(created_at__year=year)
-            if month:
-                queryset = queryset.filter(created_at__month=month)
+            queryset = filter_archive(queryset, year, month)
 
             # ✅ 确保sort不是空字符串
             if sort and sort.strip():  # 检查sort是否非空
@@ -66,61 +73,30 @@ class HomeView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # 热门文章
-        context['popular_articles'] = cache.get('popular_articles')
-        if not context['popular_articles']:
-            context['popular_articles'] = Article.objects.filter(
-                status='published'
-            ).order_by('-view_count')[:5]
-            cache.set('popular_articles', context['popular_articles'], 3600)
-
-        # 推荐文章
-        context['featured_articles'] = Article.objects.filter(
-            status='published',
-            is_featured=True
-        ).order_by('-created_at')[:3]
-
-        # 最新评论
-        from comments.models import Comment
-        context['recent_comments'] = Comment.objects.filter(
-            is_approved=True
-        ).select_related('author', 'article').order_by('-created_at')[:5]
-
-        # 分类统计
-        context['categories'] = Category.objects.filter(
-            is_active=True
-        ).annotate(
-            article_count=Count('articles')
-        ).filter(article_count__gt=0).order_by('-article_count')[:10]
-
-        # 标签云
-        from taggit.models import Tag
-        context['tags'] = Tag.objects.annotate(
-            num_times=Count('taggit_taggeditem_items')
-        ).order_by('-num_times')[:20]
-
-        context['filter_form'] = ArticleFilterForm(self.request.GET)
+        # 侧边栏（推荐、热门、最新评论、分类、标签云）读取预先构建的快照
+        context.update(get_sidebar_snapshot()['widgets'])
+
+        context['filter_form'] = self.filter_form
 
         return context
 
 
-@method_decorator(cache_page(60 * 15), name='dispatch')
-@method_decorator(vary_on_cookie, name='dispatch')
 class ArticleDetailView(DetailView):
     """文章详情视图"""
     model = Article
     template_name = 'blog/article_detail.html'
     context_object_name = 'article'
 
+    def get_queryset(self):
+        # 正文使用保存时渲染好的 rendered_content，原始内容只在渲染版本过期时才读取
+        return Article.objects.select_related('author', 'category').defer('content')
+
     def get_object(self):
         obj = super().get_object()
 
-        # 增加浏览量（排除作者自己）
+        # 增加浏览量（排除作者自己），先写入缓冲，由 flush_view_counts 批量写回
         if self.request.user != obj.author:
-            Article.objects.filter(id=obj.id).update(
-                view_count=F('view_count') + 1
-            )
-            obj.view_count += 1  # 更新本地对象
+            get_view_counter().incr(obj.pk, visitor_key(self.request))
 
         return obj
 
@@ -128,37 +104,73 @@ class ArticleDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         article = self.object
 
-        # 检查用户是否点赞或收藏
-        if self.request.user.is_authenticated:
-            context['has_liked'] = ArticleLike.objects.filter(
-                article=article,
-                user=self.request.user
-            ).exists()
-            context['has_bookmarked'] = ArticleBookmark.objects.filter(
-                article=article,
-                user=self.request.user
-            ).exists()
-
-        # 相关文章（基于分类）
-        context['related_articles'] = Article.objects.filter(
-            category=article.category,
-            status='published'
-        ).exclude(id=article.id).order_by('-created_at')[:3]
+        # 正文片段所有访问者共用，按文章版本号缓存
+        context['article_body'] = mark_safe(get_article_body(
+            article,
+            lambda: render_to_string(
+                'blog/includes/article_body.html',
+                self.get_body_context_data(article)
+            )
+        ))
+
+        return context
 
-        # 上一篇和下一篇文章
-        context['prev_article'] = Article.objects.filter(
-            status='published',
-            created_at__lt=article.created_at
-        ).order_by('-created_at').first()
+    def get_body_context_data(self, article):
+        """正文片段的上下文，不能包含任何与访问者相关的数据"""
+        context = {
+            'article': article,
+            'article_html': mark_safe(get_rendered_content(article)),
+        }
 
-        context['next_article'] = Article.objects.filter(
-            status='published',
-            created_at__gt=article.created_at
-        ).order_by('created_at').first()
+        # 相关文章：读取离线计算的相似度排名，还没有计算结果时退回同分类的最新文章
+        related_articles = list(Article.objects.for_list().filter(
+            related_backlinks__article=article,
+            status='published'
+        ).order_by('related_backlinks__rank')[:3])
+        if not related_articles:
+            related_articles = Article.objects.for_list().filter(
+                category=article.category,
+                status='published'
+            ).exclude(id=article.id).order_by('-created_at')[:3]
+        context['related_articles'] = related_articles
+
+        # 上一篇和下一篇文章（按发布时间各走一次索引查找）
+        context['prev_article'], context['next_article'] = get_adjacent_articles(
+            article, Article.objects.for_list()
+        )
 
         return context
 
 
+@method_decorator(never_cache, name='dispatch')
+class ArticleViewerStateView(View):
+    """文章详情页的访问者状态（点赞、收藏、是否可编辑）和实时计数"""
+
+    def get(self, request, pk):
+        article = get_object_or_404(
+            Article.objects.only('id', 'author_id', 'view_count', 'like_count', 'comment_count'),
+            pk=pk
+        )
+        merge_pending_views([article])
+
+        state = {
+            'view_count': article.view_count,
+            'like_count': article.like_count,
+            'comment_count': article.comment_count,
+            # 独立访客数（需开启 BLOG_VIEW_COUNTER_UNIQUE）
+            'unique_visitors': get_view_counter().unique_visitors(article.pk),
+            'can_edit': False,
+        }
+
+        # 点赞 / 收藏状态和点赞数，Redis 中的数据比数据库新
+        state.update(get_reaction_store().state(article.pk, request.user.pk))
+
+        if request.user.is_authenticated:
+            state['can_edit'] = request.user.pk == article.author_id or request.user.is_staff
+
+        return JsonResponse(state)
+
+
 class ArticleCreateView(LoginRequiredMixin, CreateView):
     """创建文章视图"""
     model = Article
@@ -226,26 +238,12 @@ class LikeArticleView(LoginRequiredMixin, View):
     """点赞文章"""
 
     def post(self, request, pk):
-        article = get_object_or_404(Article, pk=pk)
-
-        like, created = ArticleLike.objects.get_or_create(
-            article=article,
-            user=request.user
-        )
-
-        if not created:
-            like.delete()
-            liked = False
-        else:
-            article.like_count = F('like_count') + 1
-            article.save(update_fields=['like_count'])
-            liked = True
-
-        article.refresh_from_db()
+        article = get_object_or_404(Article.objects.only('id'), pk=pk)
+        liked, likes_count = get_reaction_store().toggle('likes', article.pk, request.user.pk)
 
         return JsonResponse({
             'liked': liked,
-            'likes_count': article.like_count
+            'likes_count': likes_count
         })
 
 
@@ -253,18 +251,8 @@ class BookmarkArticleView(LoginRequiredMixin, View):
     """收藏文章"""
 
     def post(self, request, pk):
-        article = get_object_or_404(Article, pk=pk)
-
-        bookmark, created = ArticleBookmark.objects.get_or_create(
-            article=article,
-            user=request.user
-        )
-
-        if not created:
-            bookmark.delete()
-            bookmarked = False
-        else:
-            bookmarked = True
+        article = get_object_or_404(Article.objects.only('id'), pk=pk)
+        bookmarked, _ = get_reaction_store().toggle('bookmarks', article.pk, request.user.pk)
 
         return JsonResponse({
             'bookmarked': bookmarked,
@@ -272,7 +260,7 @@ class BookmarkArticleView(LoginRequiredMixin, View):
         })
 
 
-class CategoryView(ListView):
+class CategoryView(CursorPaginationMixin, ListView):
     """分类视图"""
     template_name = 'blog/category.html'
     context_object_name = 'articles'
@@ -280,33 +268,35 @@ class CategoryView(ListView):
 
     def get_queryset(self):
         self.category = get_object_or_404(
-            Category,
+            Category.objects.select_related('parent'),
             slug=self.kwargs['slug']
         )
-        return Article.objects.filter(
-            category=self.category,
+        # 包含子孙分类的文章：一次 path 前缀查询
+        return Article.objects.for_list().filter(
+            subtree_filter(self.category),
             status='published'
         ).select_related('author', 'category').prefetch_related('tags')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
+        context['breadcrumbs'] = get_breadcrumbs(self.category)
+        context['subcategories'] = get_subcategories(self.category)
         return context
 
 
-class TagView(ListView):
+class TagView(CursorPaginationMixin, ListView):
     """标签视图"""
     template_name = 'blog/tag.html'
     context_object_name = 'articles'
     paginate_by = 10
 
     def get_queryset(self):
-        from taggit.models import Tag
         self.tag = get_object_or_404(
-            Tag,
+            CustomTag,
             slug=self.kwargs['slug']
         )
-        return Article.objects.filter(
+        return Article.objects.for_list().filter(
             tags=self.tag,
             status='published'
         ).select_related('author', 'category').prefetch_related('tags')
@@ -317,7 +307,7 @@ class TagView(ListView):
         return context
 
 
-class ArchiveView(ListView):
+class ArchiveView(CursorPaginationMixin, ListView):
     """归档视图"""
     template_name = 'blog/archive.html'
     context_object_name = 'articles'
@@ -327,13 +317,13 @@ class ArchiveView(ListView):
         year = self.kwargs['year']
         month = self.kwargs.get('month')
 
-        queryset = Article.objects.filter(
-            created_at__year=year,
-            status='published'
-        )
+        queryset = Article.objects.for_list().filter(status='published')
 
-        if month:
-            queryset = queryset.filter(created_at__month=month)
+        # 用 created_at 区间代替 __year / __month，可以走索引
+        try:
+            queryset = filter_archive(queryset, year, month)
+        except (ValueError, OverflowError):
+            raise Http404('无效的归档日期')
 
         return queryset.select_related('author', 'category').prefetch_related('tags')
 
@@ -342,25 +332,13 @@ class ArchiveView(ListView):
         context['year'] = self.kwargs['year']
         context['month'] = self.kwargs.get('month')
 
-        # 获取归档统计
-        from django.db.models.functions import ExtractYear, ExtractMonth
-        from django.db.models import Count
-
-        archives = Article.objects.filter(
-            status='published'
-        ).annotate(
-            year=ExtractYear('created_at'),
-            month=ExtractMonth('created_at')
-        ).values('year', 'month').annotate(
-            count=Count('id')
-        ).order_by('-year', '-month')
-
-        context['archives'] = archives
+        # 归档统计直接读取归档日历
+        context['archives'] = ArchiveMonth.objects.filter(count__gt=0)
 
         return context
 
 
-class DraftListView(LoginRequiredMixin, ListView):
+class DraftListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """草稿列表"""
     template_name = 'blog/draft_list.html'
     context_object_name = 'articles'
@@ -412,7 +390,7 @@ class PublishDraftView(LoginRequiredMixin, View):
 
         return JsonResponse({'success': False, 'error': '文章不是草稿状态'})
 
-class BookmarkListView(LoginRequiredMixin, ListView):
+class BookmarkListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """收藏列表"""
     template_name = 'blog/bookmark_list.html'
     context_object_name = 'bookmarks'
@@ -442,14 +420,19 @@ class BookmarkListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # 获取分类统计
-        from django.db.models import Count
-        categories = Category.objects.filter(
-            articles__bookmarks__user=self.request.user
-        ).annotate(count=Count('articles__bookmarks')).distinct()
+        # 获取分类统计：按分类分组统计当前用户的收藏，一次查询
+        bookmark_counts = dict(ArticleBookmark.objects.filter(
+            user=self.request.user,
+            article__category__isnull=False
+        ).values('article__category').annotate(
+            n=Count('id')
+        ).order_by().values_list('article__category', 'n'))
+        categories = list(Category.objects.filter(pk__in=bookmark_counts))
+        for category in categories:
+            category.count = bookmark_counts[category.pk]
 
         context['categories'] = categories
-        context['categories_count'] = categories.count()
+        context['categories_count'] = len(categories)
 
         # 计算作者数量
         authors = set(bookmark.article.author for bookmark in context['bookmarks'])
@@ -465,21 +448,7 @@ class PublishMultipleDraftsView(LoginRequiredMixin, View):
     def post(self, request):
         import json
         data = json.loads(request.body)
-        draft_ids = data.get('draft_ids', [])
-
-        published_count = 0
-        for draft_id in draft_ids:
-            try:
-                article = Article.objects.get(
-                    id=draft_id,
-                    author=request.user,
-                    status='draft'
-                )
-                article.status = 'published'
-                article.save()
-                published_count += 1
-            except Article.DoesNotExist:
-                continue
+        published_count = publish_drafts(request.user, data.get('draft_ids', []))
 
         return JsonResponse({
             'success': True,
@@ -493,19 +462,7 @@ class DeleteMultipleDraftsView(LoginRequiredMixin, View):
     def post(self, request):
         import json
         data = json.loads(request.body)
-        draft_ids = data.get('draft_ids', [])
-
-        deleted_count = 0
-        for draft_id in draft_ids:
-            try:
-                article = Article.objects.get(
-                    id=draft_id,
-                    author=request.user
-                )
-                article.delete()
-                deleted_count += 1
-            except Article.DoesNotExist:
-                continue
+        deleted_count = delete_articles(request.user, data.get('draft_ids', []))
 
         return JsonResponse({
             'success': True,
@@ -519,21 +476,9 @@ class RemoveMultipleBookmarksView(LoginRequiredMixin, View):
     def post(self, request):
         import json
         data = json.loads(request.body)
-        bookmark_ids = data.get('bookmark_ids', [])
-
-        removed_count = 0
-        for bookmark_id in bookmark_ids:
-            try:
-                bookmark = ArticleBookmark.objects.get(
-                    id=bookmark_id,
-                    user=request.user
-                )
-                bookmark.delete()
-                removed_count += 1
-            except ArticleBookmark.DoesNotExist:
-                continue
+        removed_count = remove_bookmarks(request.user, data.get('bookmark_ids', []))
 
         return JsonResponse({
             'success': True,
             'removed_count': removed_count
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,197 @@
+# blog/whoosh_backend.py
+"""
+Whoosh 搜索后端
+
+Whoosh 同一时间只允许一个写入者。Haystack 自带的后端在请求里随写随提交：更新用
+AsyncWriter（拿不到锁时在后台线程里重试），删除直接调用 delete_by_query，多个 gunicorn
+worker 同时写时会抛出 LockError，而且每次提交都会新增一个段。
+
+这里的后端改为：
+- 写入前最多等待 BLOG_SEARCH_WRITER_TIMEOUT 秒的写锁，超时抛出 LockError，由调用方重试；
+- batch() 内的更新和删除共用一个写入器，整批只提交一次（process_search_outbox 使用）；
+- 提交时按 BLOG_SEARCH_MERGE_POLICY 合并段，段数超过 BLOG_SEARCH_MAX_SEGMENTS 时整体优化。
+正常运行时只有 process_search_outbox worker 写索引，web 进程只读。
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from haystack.backends.whoosh_backend import WhooshEngine, WhooshSearchBackend
+from haystack.constants import DJANGO_CT, ID
+from haystack.exceptions import SkipDocument
+from haystack.utils import get_identifier, get_model_ct
+from whoosh.filedb.filestore import FileStorage
+from whoosh.writing import MERGE_SMALL, NO_MERGE, OPTIMIZE
+
+MERGE_POLICIES = {
+    'none': NO_MERGE,
+    'small': MERGE_SMALL,
+    'optimize': OPTIMIZE,
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BlogWhooshSearchBackend(WhooshSearchBackend):
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self._batch_writer = None
+
+    def open_writer(self):
+        """取得写锁，最多等待 BLOG_SEARCH_WRITER_TIMEOUT 秒"""
+        if not self.setup_complete:
+            self.setup()
+        self.index = self.index.refresh()
+        return self.index.writer(
+            timeout=_setting('BLOG_SEARCH_WRITER_TIMEOUT', 30),
+            delay=0.25,
+        )
+
+    def commit_writer(self, writer):
+        policy = MERGE_POLICIES[_setting('BLOG_SEARCH_MERGE_POLICY', 'small')]
+        writer.commit(mergetype=policy)
+        self.index = self.index.refresh()
+        max_segments = _setting('BLOG_SEARCH_MAX_SEGMENTS', 10)
+        if max_segments and self.segment_count() > max_segments:
+            self.optimize()
+
+    @contextmanager
+    def batch(self):
+        """块内的 update/remove 共用一个写入器，正常结束时提交一次"""
+        if self._batch_writer is not None:
+            yield
+            return
+        writer = self.open_writer()
+        self._batch_writer = writer
+        try:
+            yield
+        except BaseException:
+            writer.cancel()
+            raise
+        else:
+            self.commit_writer(writer)
+        finally:
+            self._batch_writer = None
+
+    def update(self, index, iterable, commit=True):
+        if self._batch_writer is None and not len(iterable):
+            return
+        with self.batch():
+            writer = self._batch_writer
+            for obj in iterable:
+                try:
+                    doc = index.full_prepare(obj)
+                except SkipDocument:
+                    self.log.debug('Indexing for object `%s` skipped', obj)
+                    continue
+
+                for key in doc:
+                    doc[key] = self._from_python(doc[key])
+                # Whoosh 2.5 以后不支持文档权重
+                doc.pop('boost', None)
+
+                try:
+                    writer.update_document(**doc)
+                except Exception:
+                    if not self.silently_fail:
+                        raise
+                    self.log.exception(
+                        'Preparing object for update',
+                        extra={'data': {'index': index, 'object': get_identifier(obj)}},
+                    )
+
+    def remove(self, obj_or_string, commit=True):
+        with self.batch():
+            self._batch_writer.delete_by_term(ID, get_identifier(obj_or_string))
+
+    def clear(self, models=None, commit=True):
+        if models is None:
+            return super().clear(models, commit)
+        with self.batch():
+            for model in models:
+                self._batch_writer.delete_by_term(DJANGO_CT, get_model_ct(model))
+
+    def build_segment(self, index, objects, path):
+        """把 objects 写入 path 下的独立索引（与主索引同一 schema），返回文档数；供并行重建使用"""
+        if not self.setup_complete:
+            self.setup()
+        segment = FileStorage(path).create().create_index(self.schema)
+        writer = segment.writer()
+        count = 0
+        for obj in objects:
+            try:
+                doc = index.full_prepare(obj)
+            except SkipDocument:
+                continue
+            for key in doc:
+                doc[key] = self._from_python(doc[key])
+            doc.pop('boost', None)
+            writer.add_document(**doc)
+            count += 1
+        writer.commit()
+        return count
+
+    def merge_segments(self, paths, models):
+        """用 build_segment 建好的索引替换主索引中这些模型的文档，一次提交并合并为一个段"""
+        writer = self.open_writer()
+        try:
+            for model in models:
+                writer.delete_by_term(DJANGO_CT, get_model_ct(model))
+            for path in paths:
+                segment = FileStorage(path).open_index()
+                with segment.reader() as reader:
+                    writer.add_reader(reader)
+        except BaseException:
+            writer.cancel()
+            raise
+        writer.commit(optimize=True)
+        self.index = self.index.refresh()
+
+    def optimize(self):
+        writer = self.open_writer()
+        writer.commit(optimize=True)
+        self.index = self.index.refresh()
+
+    def generation(self):
+        """
+        索引的提交代数，每次提交都会变化，各进程从索引目录读取，不依赖共享缓存
+
+        重建索引时目录被清空、代数从头计数，因此附上 TOC 文件的修改时间。
+        """
+        if not self.setup_complete:
+            self.setup()
+        return f'{self.index.latest_generation()}.{self.index.last_modified()}'
+
+    def segment_count(self):
+        if not self.setup_complete:
+            self.setup()
+        return len(self.index.refresh()._segments())
+
+    def health(self):
+        """段数、文档数、已删除未合并的文档数、索引文件大小（字节）"""
+        if not self.setup_complete:
+            self.setup()
+        self.index = self.index.refresh()
+        storage = self.index.storage
+        doc_count = self.index.doc_count()
+        return {
+            'segments': len(self.index._segments()),
+            'documents': doc_count,
+            'deleted': self.index.doc_count_all() - doc_count,
+            'size': sum(storage.file_length(name) for name in storage.list()),
+            'generation': self.index.latest_generation(),
+            'locked': self.is_locked(),
+        }
+
+    def is_locked(self):
+        lock = self.index.lock('WRITELOCK')
+        if lock.acquire(blocking=False):
+            lock.release()
+            return False
+        return True
+
+
+class BlogWhooshEngine(WhooshEngine):
+    backend = BlogWhooshSearchBackend
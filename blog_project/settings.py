@@ -95,7 +95,6 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'blog.context_processors.site_settings',
                 'blog.context_processors.common_context',
             ],
         },
@@ -252,11 +251,13 @@ CKEDITOR_CONFIGS= {
 # Haystack 搜索
 HAYSTACK_CONNECTIONS= {
     'default': {
-        'ENGINE': 'haystack.backends.whoosh_backend.WhooshEngine',
+        'ENGINE': 'blog.whoosh_backend.BlogWhooshEngine',
         'PATH': os.path.join(BASE_DIR, 'whoosh_index'),
     },
 }
-HAYSTACK_SIGNAL_PROCESSOR= 'haystack.signals.RealtimeSignalProcessor'
+# 保存时只记入待更新表，由 process_search_outbox --loop 批量更新索引；
+# 不运行 worker 的开发环境可改用 'blog.search_signals.BulkAwareSignalProcessor' 实时更新
+HAYSTACK_SIGNAL_PROCESSOR= 'blog.search_signals.QueuedSignalProcessor'
 
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -284,6 +285,54 @@ GITHUB_URL = config('GITHUB_URL', default='')
 WEIBO_URL = config('WEIBO_URL', default='')
 GOOGLE_ANALYTICS_ID = config('GOOGLE_ANALYTICS_ID', default='')
 
+# 列表分页：True 时使用游标分页（?after=），深翻页不再执行 OFFSET 和 COUNT(*)
+BLOG_CURSOR_PAGINATION = config('BLOG_CURSOR_PAGINATION', default=True, cast=bool)
+
+# 浏览量写回缓冲：None 时根据缓存后端自动选择 'redis' 或进程内的 'local'
+BLOG_VIEW_COUNTER_BACKEND = None
+BLOG_VIEW_COUNTER_UNIQUE = config('BLOG_VIEW_COUNTER_UNIQUE', default=False, cast=bool)  # HyperLogLog 独立访客统计
+BLOG_VIEW_COUNTER_FLUSH_INTERVAL = 60  # 'local' 后端自动写回的间隔（秒）
+
+# 点赞 / 收藏存储：None 时根据缓存后端自动选择 'redis'（批量写回）或 'database'
+BLOG_REACTION_BACKEND = None
+
+# 文章详情页正文缓存时间（秒），文章或评论变化时会立即失效
+BLOG_ARTICLE_BODY_CACHE_TIMEOUT = 60 * 60
+
+# 首页侧边栏快照的最长使用时间（秒），数据变化时由信号即时重建
+BLOG_SIDEBAR_MAX_AGE = 60 * 60
+
+# 站点设置、导航分类等进程内缓存检查共享版本号的最短间隔（秒）
+BLOG_LOCAL_CACHE_CHECK_INTERVAL = 1.0
+
+# 每篇文章保存的相关文章数（离线计算，详情页展示前 3 篇）
+BLOG_RELATED_ARTICLES_TOP_K = 6
+
+# 图片缩略图生成：None 时根据缓存后端自动选择 'redis'（由 build_image_variants --loop 处理）或进程内的 'thread'
+BLOG_IMAGE_VARIANT_BACKEND = None
+
+# 文章搜索：'index' 使用 Haystack 索引（按相关度排序），'database' 退回 LIKE 查询
+BLOG_SEARCH_BACKEND = config('BLOG_SEARCH_BACKEND', default='index')
+
+# Whoosh 索引写入：等待写锁的最长时间（秒）、提交时的段合并策略（'none'、'small'、'optimize'），
+# 段数超过 BLOG_SEARCH_MAX_SEGMENTS 时提交后整体优化；process_search_outbox --loop 另按
+# BLOG_SEARCH_OPTIMIZE_INTERVAL（秒，0 为不定时优化）定时优化
+BLOG_SEARCH_WRITER_TIMEOUT = 30
+BLOG_SEARCH_MERGE_POLICY = 'small'
+BLOG_SEARCH_MAX_SEGMENTS = 10
+BLOG_SEARCH_OPTIMIZE_INTERVAL = 24 * 60 * 60
+
+# 全文字段的分词方式：'bigram'（CJK 二元分词，默认）、'jieba'（词典分词，需另装 jieba）、'stemming'（Whoosh 默认），
+# 修改后需执行 python manage.py rebuild_search_index
+BLOG_SEARCH_ANALYZER = 'bigram'
+
+# 搜索命中（排好序的文章ID和命中总数）的缓存时间（秒），0 为不缓存；索引每次提交后自动失效
+BLOG_SEARCH_CACHE_TIMEOUT = 10 * 60
+
+# 搜索框输入提示的快照文件：由 python manage.py build_suggest_snapshot 生成，worker 启动时载入；
+# 提示的排序权重（浏览量、文章数）不随浏览量写回和计数变化更新，需定期重新生成
+BLOG_SUGGEST_SNAPSHOT = os.path.join(BASE_DIR, 'suggest_snapshot.json')
+
 # 文件上传配置
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
 
 application = get_wsgi_application()
+
+# worker 启动时从快照载入搜索提示，第一次输入时不必查询数据库
+from blog.suggest import suggest_store  # noqa: E402
+
+suggest_store.load_snapshot()
@@ -0,0 +1,222 @@
+# search/query.py
+"""
+文章搜索
+
+有关键词时从 Haystack / Whoosh 索引取按相关度排序的结果，命中数也来自索引，
+当前页的文章用一次主键查询取出；BLOG_SEARCH_BACKEND = 'database' 或索引不可用时
+退回 LIKE 查询。两条路径的筛选条件含义相同：分类按 slug 精确匹配，标签名和作者用户名
+按包含匹配、忽略大小写。
+
+索引命中（排好序的前若干个文章ID和命中总数）按规范化后的查询条件缓存，键中带有索引的
+提交代数：索引每次提交后旧缓存自然失效，不需要逐条删除，也不会返回过期的命中。
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from blog.models import Article, CustomTag
+
+logger = logging.getLogger(__name__)
+
+# 高级搜索的排序方式
+SORT_FIELDS = {
+    'newest': '-created_at',
+    'oldest': 'created_at',
+    'popular': '-view_count',
+    'commented': '-comment_count',
+}
+# 索引中有的排序字段；浏览量、评论数经常变化，不进索引
+INDEX_SORT_FIELDS = {'newest', 'oldest'}
+# 按浏览量、评论数排序时，最多取多少条索引命中交给数据库排序
+MAX_RANKED_RESULTS = 1000
+# 按相关度或时间排序时缓存的命中数，之后的页直接查询索引
+CACHED_RESULTS = 200
+SEARCH_CACHE_KEY = 'search:hits:%s:%s'
+
+
+def use_index():
+    return getattr(settings, 'BLOG_SEARCH_BACKEND', 'index') == 'index'
+
+
+def load_articles(ids):
+    """按给定顺序取出文章，索引中残留的已删除或已取消发布的文章跳过"""
+    articles = Article.objects.for_list().filter(
+        status='published'
+    ).select_related('author', 'category').in_bulk(ids)
+    return [articles[pk] for pk in ids if pk in articles]
+
+
+class IndexResults:
+    """
+    把 SearchQuerySet 包装成 Paginator 可用的序列
+
+    ids 是已知的前若干个命中（来自结果缓存），落在其中的页不再查询索引。
+    """
+
+    def __init__(self, sqs, ids=(), total=None):
+        self.sqs = sqs
+        self.ids = list(ids)
+        self.total = total
+
+    def count(self):
+        if self.total is None:
+            self.total = self.sqs.count()
+        return self.total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            stop = self.count() if key.stop is None else key.stop
+            if stop <= len(self.ids) or len(self.ids) >= self.count():
+                return load_articles(self.ids[key])
+            return load_articles([int(result.pk) for result in self.sqs[key]])
+        return self[key:key + 1][0]
+
+
+def _day_bound(value, end=False):
+    day = parse_date(value) if value else None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.max if end else time.min))
+
+
+def _iso_day(value):
+    day = parse_date(value) if value else None
+    return day.isoformat() if day else ''
+
+
+def _matching_names(queryset, field, value):
+    """名称中包含 value（忽略大小写）的全部 field 值，与数据库查询的 icontains 一致"""
+    return list(queryset.filter(**{f'{field}__icontains': value}).values_list(field, flat=True))
+
+
+def _search_queryset(params):
+    """由 normalize_search 规范化后的条件构造 SearchQuerySet，与缓存键使用同一组条件"""
+    sqs = SearchQuerySet().models(Article).auto_query(params.get('q', ''))
+    if 'category' in params:
+        sqs = sqs.filter(category__exact=params['category'])
+    # 标签和作者与数据库查询一样按包含匹配：先在数据库中找出匹配的名称（两张小表），
+    # 再在索引中按名称精确筛选
+    if 'tag' in params:
+        names = _matching_names(CustomTag.objects.all(), 'name', params['tag'])
+        sqs = sqs.filter(tags__in=names) if names else sqs.none()
+    if 'author' in params:
+        names = _matching_names(get_user_model().objects.all(), 'username', params['author'])
+        sqs = sqs.filter(author__in=names) if names else sqs.none()
+    start = _day_bound(params.get('start_date'))
+    end = _day_bound(params.get('end_date'), end=True)
+    if start:
+        sqs = sqs.filter(created_at__gte=start)
+    if end:
+        sqs = sqs.filter(created_at__lte=end)
+    if params.get('sort') in INDEX_SORT_FIELDS:
+        sqs = sqs.order_by(SORT_FIELDS[params['sort']])
+    return sqs
+
+
+def normalize_search(query, category, tag, author, start_date, end_date, sort):
+    """
+    规范化查询条件：关键词合并空白、忽略大小写（各分词方式都会转小写），
+    日期统一格式，索引不支持的排序方式按相关度处理，空条件省略
+    """
+    params = {
+        'q': ' '.join(query.split()).casefold(),
+        'category': category.strip(),
+        'tag': tag.strip(),
+        'author': author.strip(),
+        'start_date': _iso_day(start_date),
+        'end_date': _iso_day(end_date),
+        'sort': sort if sort in SORT_FIELDS else '',
+    }
+    return {name: value for name, value in params.items() if value}
+
+
+def _search_cache_key(params):
+    """当前索引代数下这组条件的缓存键；后端不提供代数时返回 None，不缓存"""
+    timeout = getattr(settings, 'BLOG_SEARCH_CACHE_TIMEOUT', 0)
+    backend = connections['default'].get_backend()
+    if not timeout or not hasattr(backend, 'generation'):
+        return None
+    digest = hashlib.md5(
+        json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    return SEARCH_CACHE_KEY % (backend.generation(), digest)
+
+
+def _index_hits(sqs, params, limit):
+    """(前 limit 个命中的文章ID, 命中总数)，按索引代数缓存"""
+    key = _search_cache_key(params)
+    hits = cache.get(key) if key else None
+    if hits is None:
+        ids = [int(result.pk) for result in sqs[:limit]]
+        hits = (ids, sqs.count())
+        if key:
+            cache.set(key, hits, settings.BLOG_SEARCH_CACHE_TIMEOUT)
+    return hits
+
+
+def _index_search(query, category, tag, author, start_date, end_date, sort):
+    params = normalize_search(query, category, tag, author, start_date, end_date, sort)
+    sqs = _search_queryset(params)
+
+    if sort in SORT_FIELDS and sort not in INDEX_SORT_FIELDS:
+        # 索引只负责匹配，排序交给数据库
+        ids, _ = _index_hits(sqs, params, MAX_RANKED_RESULTS)
+        return Article.objects.for_list().filter(
+            pk__in=ids,
+            status='published'
+        ).select_related('author', 'category').order_by(SORT_FIELDS[sort])
+
+    # 在这里执行一次查询，索引不可用时由调用方退回数据库
+    ids, total = _index_hits(sqs, params, CACHED_RESULTS)
+    return IndexResults(sqs, ids, total)
+
+
+def _database_search(query, category, tag, author, start_date, end_date, sort):
+    articles = Article.objects.for_list().filter(
+        status='published'
+    ).select_related('author', 'category')
+    if query:
+        articles = articles.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(excerpt__icontains=query)
+        )
+    if category:
+        articles = articles.filter(category__slug=category)
+    if tag:
+        articles = articles.filter(tags__name__icontains=tag)
+    if author:
+        articles = articles.filter(author__username__icontains=author)
+    if start_date:
+        articles = articles.filter(created_at__gte=start_date)
+    if end_date:
+        articles = articles.filter(created_at__lte=end_date)
+    return articles.order_by(SORT_FIELDS.get(sort, '-created_at'))
+
+
+def search_articles(query, category='', tag='', author='', start_date='', end_date='', sort=''):
+    """
+    返回可直接交给 Paginator 的文章结果
+
+    有关键词时默认按相关度排序；只有筛选条件时直接查数据库（这些条件都有索引）。
+    """
+    args = (query, category, tag, author, start_date, end_date, sort)
+    if query and use_index():
+        try:
+            return _index_search(*args)
+        except Exception:
+            logger.exception('搜索索引不可用，退回数据库查询')
+    return _database_search(*args)
@@ -1,3 +1,90 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from haystack import connections
+
+from blog.models import Article, Category
+from blog.search_indexes import ArticleIndex
+
+from .query import _database_search, normalize_search, search_articles
+
+
+@override_settings(BLOG_SEARCH_BACKEND='index', BLOG_SEARCH_CACHE_TIMEOUT=60)
+class IndexSearchTests(TestCase):
+    """在临时目录的 Whoosh 索引上比较索引查询与数据库查询"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index_path = tempfile.mkdtemp()
+        cls.connections_info = connections.connections_info
+        connections.connections_info = {
+            'default': dict(cls.connections_info['default'], PATH=cls.index_path),
+        }
+        connections.reload('default')
+
+    @classmethod
+    def tearDownClass(cls):
+        connections.connections_info = cls.connections_info
+        connections.reload('default')
+        shutil.rmtree(cls.index_path, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(
+            username='Writer', email='writer@example.com', password='pass'
+        )
+        cls.category, _ = Category.objects.get_or_create(slug='python', defaults={'name': 'Python'})
+        cls.articles = []
+        for i, tags in enumerate((['Big Data'], ['python', 'Big Data'], ['Python 3'])):
+            article = Article.objects.create(
+                title=f'Zebra notes {i}', content='<p>zebra</p>', author=user,
+                status='published', category=cls.category if i else None,
+            )
+            article.tags.set(tags)
+            cls.articles.append(article)
+
+    def setUp(self):
+        cache.clear()
+        backend = connections['default'].get_backend()
+        backend.clear()
+        backend.update(ArticleIndex(), list(Article.objects.filter(status='published')))
+
+    def pks(self, results):
+        return sorted(article.pk for article in results[:100])
+
+    def test_filters_match_database_search(self):
+        for tag, author in [('big', ''), ('PYTH', ''), ('n 3', 'writ'), ('', 'nobody'), ('x', '')]:
+            with self.subTest(tag=tag, author=author):
+                expected = sorted(set(
+                    _database_search('zebra', '', tag, author, '', '', '').values_list('pk', flat=True)
+                ))
+                self.assertEqual(self.pks(search_articles('zebra', tag=tag, author=author)), expected)
+
+    def test_padded_filters_share_cache_entry_and_results(self):
+        self.assertEqual(
+            normalize_search(' Zebra ', ' python', '', '', '', '', ''),
+            normalize_search('zebra', 'python', '', '', '', '', ''),
+        )
+        expected = [article.pk for article in self.articles[1:]]
+        # 先用带空格的条件填充缓存，再用规范的条件读取；反过来也一样
+        self.assertEqual(self.pks(search_articles('zebra', category=' python')), expected)
+        self.assertEqual(self.pks(search_articles('zebra', category='python')), expected)
+        cache.clear()
+        self.assertEqual(self.pks(search_articles('zebra', category='python')), expected)
+        self.assertEqual(self.pks(search_articles('zebra', category=' python ')), expected)
+
+        cache.clear()
+        expected = [article.pk for article in self.articles[:2]]
+        self.assertEqual(self.pks(search_articles('zebra', tag=' big')), expected)
+        self.assertEqual(self.pks(search_articles('zebra', tag='big')), expected)
+
+    def test_index_commit_invalidates_cached_hits(self):
+        self.assertEqual(len(self.pks(search_articles('zebra'))), 3)
+        backend = connections['default'].get_backend()
+        backend.remove(self.articles[0])
+        self.assertEqual(len(self.pks(search_articles('zebra'))), 2)
@@ -7,4 +7,5 @@ app_name = 'search'
 urlpatterns = [
     path('', views.search, name='search'),
     path('advanced/', views.advanced_search, name='advanced'),
+    path('suggest/', views.suggest, name='suggest'),
 ]
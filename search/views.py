@@ -1,11 +1,14 @@
 # search/views.py
-from typing import Any
-
 from django.shortcuts import render
-from django.core.paginator import Paginator, Page
+from django.core.paginator import Paginator
 from django.db.models import Q
-from blog.models import Article, Category
-from taggit.models import Tag  # 如果安装了 django-taggit
+from django.http import JsonResponse
+from blog.models import Category, CustomTag
+from blog.suggest import suggest_store
+from .query import search_articles
+
+# 输入提示最多返回的条数
+MAX_SUGGESTIONS = 20
 
 
 def search(request):
@@ -23,62 +26,45 @@ def search(request):
 
     if query:
         if search_type == 'articles':
-            # 文章搜索 - 使用普通查询而不是 Haystack
-            articles = Article.objects.filter(
-                Q(title__icontains=query) |
-                Q(content__icontains=query) |
-                Q(excerpt__icontains=query),
-                status='published'
-            ).select_related('author', 'category')
-
-            # 分页
-            paginator = Paginator(articles, 10)
+            # 文章搜索：按相关度排序的索引结果，命中数来自索引
+            paginator = Paginator(search_articles(query), 10)
             page_obj = paginator.get_page(page)
 
             context['results'] = page_obj
-            context['total_results'] = articles.count()
+            context['total_results'] = paginator.count
             context['is_paginated'] = paginator.num_pages > 1
 
         elif search_type == 'tags':
             # 标签搜索
-            tags = Tag.objects.filter(
+            tags = CustomTag.objects.filter(
                 Q(name__icontains=query)
-            ).distinct()
+            ).order_by('-published_article_count', 'name')
 
             # 分页
             paginator = Paginator(tags, 20)
             page_obj = paginator.get_page(page)
 
             context['results'] = page_obj
-            context['total_results'] = tags.count()
+            context['total_results'] = paginator.count
             context['is_paginated'] = paginator.num_pages > 1
 
         else:
             # 综合搜索
-            articles = Article.objects.filter(
-                Q(title__icontains=query) |
-                Q(content__icontains=query) |
-                Q(excerpt__icontains=query),
-                status='published'
-            ).select_related('author', 'category')[:5]
-
-            tags = Tag.objects.filter(
+            articles = search_articles(query)
+
+            tags = list(CustomTag.objects.filter(
                 Q(name__icontains=query)
-            ).distinct()[:10]
+            ).order_by('-published_article_count', 'name')[:10])
 
-            categories = Category.objects.filter(
+            categories = list(Category.objects.filter(
                 Q(name__icontains=query) |
                 Q(description__icontains=query)
-            )[:5]
+            )[:5])
 
-            context['article_results'] = articles
+            context['article_results'] = articles[:5]
             context['tag_results'] = tags
             context['category_results'] = categories
-            context['total_results'] = (
-                    articles.count() +
-                    tags.count() +
-                    categories.count()
-            )
+            context['total_results'] = articles.count() + len(tags) + len(categories)
 
     return render(request, 'search/results.html', context)
 
@@ -94,42 +80,16 @@ def advanced_search(request):
     sort_by = request.GET.get('sort_by', '-created_at')
     page = request.GET.get('page', 1)
 
-    # 构建查询
-    articles = Article.objects.filter(status='published')
-
-    if query:
-        articles = articles.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(excerpt__icontains=query)
-        )
-
-    if category:
-        articles = articles.filter(category__slug=category)
-
-    if tag:
-        articles = articles.filter(tags__name__icontains=tag)
-
-    if author:
-        articles = articles.filter(author__username__icontains=author)
-
-    if start_date:
-        articles = articles.filter(created_at__gte=start_date)
-
-    if end_date:
-        articles = articles.filter(created_at__lte=end_date)
-
-    # 排序选项 - 简化，只保留支持的字段
-    sort_options = {
-        'newest': '-created_at',
-        'oldest': 'created_at',
-        'popular': '-view_count',
-        # 如果模型没有这些字段，注释掉
-        # 'liked': '-like_count',
-        'commented': '-comment_count',
-    }
-
-    articles = articles.order_by(sort_options.get(sort_by, '-created_at'))
+    # 有关键词时走搜索索引，排序见 search.query.SORT_FIELDS
+    articles = search_articles(
+        query,
+        category=category,
+        tag=tag,
+        author=author,
+        start_date=start_date,
+        end_date=end_date,
+        sort=sort_by,
+    )
 
     # 分页
     paginator = Paginator(articles, 15)
@@ -137,7 +97,7 @@ def advanced_search(request):
 
     # 获取分类和标签用于筛选
     categories = Category.objects.all()  # 移除 is_active 过滤
-    tags = Tag.objects.all()[:20]
+    tags = CustomTag.objects.order_by('-published_article_count')[:20]
 
     context = {
         'results': page_obj,
@@ -150,8 +110,22 @@ def advanced_search(request):
         'sort_by': sort_by,
         'categories': categories,
         'tags': tags,
-        'total_results': articles.count(),
+        'total_results': paginator.count,
         'is_paginated': paginator.num_pages > 1,
     }
 
     return render(request, 'search/results.html', context)
+
+
+def suggest(request):
+    """搜索框输入提示：按前缀匹配文章标题、标签名和分类名，不访问数据库"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), MAX_SUGGESTIONS)
+    except ValueError:
+        limit = 8
+
+    return JsonResponse({
+        'query': query,
+        'suggestions': suggest_store.search(query[:100], limit),
+    })
@@ -76,12 +76,12 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // 搜索框自动完成
-    const searchInput = document.querySelector('input[name="q"]');
+    const searchInput = document.querySelector('input[name="q"][data-suggest-url]');
     if (searchInput) {
         searchInput.addEventListener('input', debounce(function() {
             const query = this.value.trim();
-            if (query.length > 2) {
-                fetch(`/api/search/suggest?q=${encodeURIComponent(query)}`)
+            if (query.length > 0) {
+                fetch(`${searchInput.dataset.suggestUrl}?q=${encodeURIComponent(query)}`)
                     .then(response => response.json())
                     .then(data => {
                         // 显示搜索建议
@@ -106,7 +106,14 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // 显示搜索建议
     function showSearchSuggestions(suggestions) {
-        // 实现搜索建议显示逻辑
-        console.log('Search suggestions:', suggestions);
+        const list = document.getElementById(searchInput.getAttribute('list'));
+        if (!list) {
+            return;
+        }
+        list.replaceChildren(...suggestions.map(function(suggestion) {
+            const option = document.createElement('option');
+            option.value = suggestion.text;
+            return option;
+        }));
     }
 });
\ No newline at end of file